@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+MineraLog archive reader.
+
+Reads the manifest and mineral records of a MineraLog ZIP export, decrypting
+``minerals.json`` when the manifest says it is encrypted. Only the
+PBKDF2-SHA256 key derivation written by csv_to_zip.py is supported; archives
+encrypted on a device (Argon2id) must be re-exported without a password.
+"""
+
+import codecs
+import io
+import json
+import zipfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from csv_to_zip import decrypt_content
+
+
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+class ArchiveError(Exception):
+    """Raised when an archive cannot be read."""
+
+
+def iter_json_array(stream: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array read from a binary stream.
+
+    Only one element is decoded at a time, so memory stays proportional to the
+    largest element rather than to the whole document.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and separators up to the next element
+        while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != '[':
+                    raise ValueError("Expected a JSON array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                value, end = None, None
+            # A value ending exactly at the buffer end may be a truncated number
+            if end is not None and (end < len(buffer) or eof):
+                yield value
+                pos = end
+                continue
+        if eof:
+            raise ValueError("Unexpected end of JSON array")
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + text.decode(chunk, final=eof)
+        pos = 0
+
+
+def read_manifest(zf: zipfile.ZipFile) -> Dict[str, Any]:
+    """Return the parsed manifest.json of an open archive."""
+    try:
+        return json.loads(zf.read('manifest.json'))
+    except KeyError:
+        raise ArchiveError(f"{zf.filename}: missing manifest.json")
+
+
+def read_minerals_json(zf: zipfile.ZipFile, manifest: Dict[str, Any],
+                       password: Optional[str] = None) -> bytes:
+    """Return the plaintext bytes of minerals.json, decrypting them if needed."""
+    try:
+        content = zf.read('minerals.json')
+    except KeyError:
+        raise ArchiveError(f"{zf.filename}: missing minerals.json")
+
+    if not manifest.get('encrypted'):
+        return content
+
+    if manifest.get('kdf') != 'PBKDF2-SHA256':
+        raise ArchiveError(f"{zf.filename}: unsupported key derivation {manifest.get('kdf')!r}")
+    if not password:
+        raise ArchiveError(f"{zf.filename}: archive is encrypted, a password is required")
+
+    try:
+        return decrypt_content(content, password, manifest['kdfParams']['saltHex'], manifest['ivHex'])
+    except RuntimeError:
+        raise
+    except Exception:
+        raise ArchiveError(f"{zf.filename}: decryption failed (wrong password?)")
+
+
+def iter_minerals(archive_path: Path, password: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the mineral dictionaries of an archive one at a time.
+
+    Plain archives are decompressed and parsed incrementally. Encrypted ones are
+    decrypted in one piece, since AES-GCM authenticates the whole ciphertext,
+    and then parsed incrementally.
+    """
+    with zipfile.ZipFile(archive_path) as zf:
+        manifest = read_manifest(zf)
+        if manifest.get('encrypted'):
+            stream = io.BytesIO(read_minerals_json(zf, manifest, password))
+        else:
+            try:
+                stream = zf.open('minerals.json')
+            except KeyError:
+                raise ArchiveError(f"{zf.filename}: missing minerals.json")
+        with stream:
+            yield from iter_json_array(stream)
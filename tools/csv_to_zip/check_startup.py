@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+MineraLog startup check.
+
+Imports the ``mineralog`` dispatcher and each subcommand module in a fresh
+interpreter with ``python -X importtime`` and fails if the cumulative import
+time exceeds its budget, or if a module pulls in a dependency that must stay
+lazy (``cryptography`` is only imported when an archive is actually
+encrypted or decrypted).
+
+Each module is timed several times and the fastest run is kept, which filters
+out noise from a busy machine without hiding a real regression.
+
+Usage:
+    python check_startup.py
+    python check_startup.py --runs 5 --budget-scale 2
+"""
+
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from mineralog_cli import COMMANDS
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+# Cumulative import budgets in milliseconds. Measured locally: the dispatcher
+# takes ~3 ms, the heaviest command module (csv_to_zip, via merge_archives)
+# ~40 ms, most of it argparse and zipfile.
+DISPATCHER_BUDGET_MS = 10.0
+COMMAND_BUDGET_MS = 100.0
+
+# Modules that must never be imported just by starting a command
+FORBIDDEN_IMPORTS = ('cryptography',)
+
+
+def import_profile(module: str) -> Tuple[float, List[str]]:
+    """Return (cumulative import time in ms, imported module names) of ``module``."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=TOOLS_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = None
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        name = fields[2].strip()
+        imported.append(name)
+        if name == module:
+            cumulative_us = int(fields[1])
+    if cumulative_us is None:
+        raise RuntimeError(f"{module}: not found in -X importtime output")
+    return cumulative_us / 1000.0, imported
+
+
+def check_module(module: str, budget_ms: float, runs: int) -> Optional[str]:
+    """Return an error message if ``module`` is over budget or imports a forbidden module."""
+    best_ms = None
+    for _ in range(runs):
+        elapsed_ms, imported = import_profile(module)
+        forbidden = sorted({name for name in imported if name.split('.')[0] in FORBIDDEN_IMPORTS})
+        if forbidden:
+            return f"{module}: imports {', '.join(forbidden)} at startup"
+        best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+
+    status = '✓' if best_ms <= budget_ms else '✗'
+    print(f"  {status} {module:<22} {best_ms:7.1f} ms  (budget {budget_ms:.0f} ms)")
+    if best_ms > budget_ms:
+        return f"{module}: {best_ms:.1f} ms exceeds the {budget_ms:.0f} ms budget"
+    return None
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Check the import time of the MineraLog tools')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per module, fastest kept (default: 3)')
+    parser.add_argument('--budget-scale', type=float, default=1.0,
+                        help='Multiply every budget, e.g. for slow CI machines (default: 1)')
+
+    args = parser.parse_args(argv)
+
+    budgets: Dict[str, float] = {'mineralog_cli': DISPATCHER_BUDGET_MS}
+    for module, _ in COMMANDS.values():
+        budgets[module] = COMMAND_BUDGET_MS
+
+    print(f"Import times ({sys.executable}, best of {args.runs}):")
+    errors = [error for module, budget in budgets.items()
+              if (error := check_module(module, budget * args.budget_scale, args.runs))]
+
+    if errors:
+        for error in errors:
+            print(f"Error: {error}", file=sys.stderr)
+        sys.exit(1)
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+MineraLog Collection Statistics
+Aggregates totals over many ZIP exports: counts by group, country and status,
+total price and estimated value, and photo counts by type.
+
+Archives are streamed record by record in a process pool. Each archive yields
+a mergeable partial aggregate, which can be cached so that adding one archive
+does not recompute the others. Cache entries are keyed on the size and CRC-32
+of manifest.json and minerals.json, read from the ZIP central directory, so a
+cache hit never reads the archive's contents. Archives that cannot be read
+(corrupt ZIP or JSON, encrypted with an unsupported key derivation, or
+encrypted while cryptography is not installed) are reported and left out of
+the report, and the run exits with status 1.
+
+Usage:
+    python collection_stats.py exports/*.zip -o report.json
+    python collection_stats.py exports/*.zip -o report.json --cache-dir .stats-cache --password secret
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Bump when the aggregate layout changes so stale cache entries are ignored
+STATS_VERSION = 1
+UNKNOWN = '(none)'
+
+
+class CollectionStats:
+    """Mergeable partial aggregate over mineral records."""
+
+    __slots__ = ('archives', 'minerals', 'photos', 'by_group', 'by_country', 'by_status',
+                 'photos_by_type', 'total_price', 'total_estimated_value')
+
+    def __init__(self):
+        self.archives = 0
+        self.minerals = 0
+        self.photos = 0
+        self.by_group: Counter = Counter()
+        self.by_country: Counter = Counter()
+        self.by_status: Counter = Counter()
+        self.photos_by_type: Counter = Counter()
+        self.total_price = 0.0
+        self.total_estimated_value = 0.0
+
+    def add(self, mineral: Dict[str, Any]) -> None:
+        """Account for one mineral dictionary of minerals.json."""
+        self.minerals += 1
+        self.by_group[mineral.get('group') or UNKNOWN] += 1
+        self.by_status[mineral.get('status') or UNKNOWN] += 1
+
+        provenance = mineral.get('provenance') or {}
+        self.by_country[provenance.get('country') or UNKNOWN] += 1
+        self.total_price += provenance.get('price') or 0.0
+        self.total_estimated_value += provenance.get('estimatedValue') or 0.0
+
+        for photo in mineral.get('photos') or ():
+            self.photos += 1
+            self.photos_by_type[photo.get('type') or UNKNOWN] += 1
+
+    def merge(self, other: 'CollectionStats') -> 'CollectionStats':
+        """Fold another partial aggregate into this one."""
+        self.archives += other.archives
+        self.minerals += other.minerals
+        self.photos += other.photos
+        self.by_group.update(other.by_group)
+        self.by_country.update(other.by_country)
+        self.by_status.update(other.by_status)
+        self.photos_by_type.update(other.photos_by_type)
+        self.total_price += other.total_price
+        self.total_estimated_value += other.total_estimated_value
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'archives': self.archives,
+            'minerals': self.minerals,
+            'photos': self.photos,
+            'byGroup': dict(self.by_group.most_common()),
+            'byCountry': dict(self.by_country.most_common()),
+            'byStatus': dict(self.by_status.most_common()),
+            'photosByType': dict(self.photos_by_type.most_common()),
+            'totalPrice': self.total_price,
+            'totalEstimatedValue': self.total_estimated_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CollectionStats':
+        stats = cls()
+        stats.archives = data['archives']
+        stats.minerals = data['minerals']
+        stats.photos = data['photos']
+        stats.by_group.update(data['byGroup'])
+        stats.by_country.update(data['byCountry'])
+        stats.by_status.update(data['byStatus'])
+        stats.photos_by_type.update(data['photosByType'])
+        stats.total_price = data['totalPrice']
+        stats.total_estimated_value = data['totalEstimatedValue']
+        return stats
+
+
+def archive_stats(archive_path: Path, password: Optional[str] = None) -> CollectionStats:
+    """Stream one archive into a partial aggregate."""
+    from archive_reader import iter_minerals
+
+    stats = CollectionStats()
+    stats.archives = 1
+    for mineral in iter_minerals(archive_path, password):
+        stats.add(mineral)
+    return stats
+
+
+def archive_key(archive_path: Path) -> str:
+    """Cache key of an archive, from its central directory only."""
+    import hashlib
+    import zipfile
+
+    with zipfile.ZipFile(archive_path) as zf:
+        # manifest.json carries the export time, minerals.json the records
+        members = [zf.NameToInfo.get(name) for name in ('manifest.json', 'minerals.json')]
+    fingerprint = ';'.join(f"{info.file_size}:{info.CRC:08x}" if info else '-' for info in members)
+    return hashlib.sha256(fingerprint.encode('ascii')).hexdigest()
+
+
+def _cache_path(cache_dir: Path, checksum: str) -> Path:
+    return cache_dir / f"{checksum}.json"
+
+
+def load_cached(cache_dir: Optional[Path], checksum: str) -> Optional[CollectionStats]:
+    """Return the cached partial aggregate of an archive, if still valid."""
+    if cache_dir is None:
+        return None
+    try:
+        data = json.loads(_cache_path(cache_dir, checksum).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    if data.get('version') != STATS_VERSION:
+        return None
+    return CollectionStats.from_dict(data['stats'])
+
+
+def store_cached(cache_dir: Optional[Path], checksum: str, stats: CollectionStats) -> None:
+    """Write a partial aggregate to the cache, atomically."""
+    if cache_dir is None:
+        return
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    target = _cache_path(cache_dir, checksum)
+    tmp = target.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({'version': STATS_VERSION, 'stats': stats.to_dict()}), encoding='utf-8')
+    os.replace(tmp, target)
+
+
+def _worker(job: Tuple[Path, Optional[str], Optional[Path]]
+            ) -> Tuple[Path, Optional[Dict[str, Any]], bool, Optional[str]]:
+    """Process-pool entry point: returns (archive, partial aggregate, served from cache, error)."""
+    import zipfile
+    import zlib
+    from archive_reader import ArchiveError
+
+    archive_path, password, cache_dir = job
+    try:
+        checksum = archive_key(archive_path) if cache_dir is not None else ''
+        cached = load_cached(cache_dir, checksum)
+        if cached is not None:
+            return archive_path, cached.to_dict(), True, None
+        stats = archive_stats(archive_path, password)
+    except ArchiveError as e:
+        return archive_path, None, False, str(e)
+    except (zipfile.BadZipFile, zlib.error, ValueError, KeyError, RuntimeError) as e:
+        # Corrupt ZIP or JSON, missing manifest fields, or cryptography not installed:
+        # an exception escaping a pool worker would abort every other archive too
+        return archive_path, None, False, f"{archive_path}: {e}"
+    store_cached(cache_dir, checksum, stats)
+    return archive_path, stats.to_dict(), False, None
+
+
+def aggregate(archives: Iterable[Path], password: Optional[str] = None, cache_dir: Optional[Path] = None,
+              workers: Optional[int] = None) -> Tuple[CollectionStats, int, List[str]]:
+    """Merge the partial aggregates of many archives; returns (totals, cache hits, errors)."""
+    jobs = [(path, password, cache_dir) for path in archives]
+    if workers == 1 or len(jobs) <= 1:
+        results = list(map(_worker, jobs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_worker, jobs))
+
+    total = CollectionStats()
+    cache_hits = 0
+    errors = []
+    for _, partial, cached, error in results:
+        if error is not None:
+            errors.append(error)
+            continue
+        total.merge(CollectionStats.from_dict(partial))
+        cache_hits += cached
+    return total, cache_hits, errors
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Aggregate statistics over MineraLog ZIP exports')
+    parser.add_argument('archives', nargs='+', type=Path, help='ZIP exports to aggregate')
+    parser.add_argument('-o', '--output', required=True, type=Path, help='Output report JSON file')
+    parser.add_argument('--password', type=str, help='Password of encrypted exports')
+    parser.add_argument('--cache-dir', type=Path, help='Directory for per-archive cached results')
+    parser.add_argument('-j', '--jobs', type=int, help='Worker processes (default: CPU count)')
+
+    args = parser.parse_args(argv)
+
+    missing = [str(p) for p in args.archives if not p.exists()]
+    if missing:
+        print(f"Error: Archive(s) not found: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Aggregating {len(args.archives)} archive(s)...")
+    totals, cache_hits, errors = aggregate(args.archives, args.password, args.cache_dir, args.jobs)
+    for error in errors:
+        print(f"Error: {error}", file=sys.stderr)
+
+    report = {
+        'generatedAt': datetime.now(timezone.utc).isoformat(),
+        **totals.to_dict(),
+    }
+    args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    print(f"✓ Created {args.output}")
+    print(f"  Archives: {totals.archives} ({cache_hits} from cache, {len(errors)} skipped)")
+    print(f"  Minerals: {totals.minerals}")
+    print(f"  Photos: {totals.photos}")
+    print(f"  Total price: {totals.total_price:.2f}")
+    print(f"  Total estimated value: {totals.total_estimated_value:.2f}")
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+MineraLog conversion journal.
+
+Checkpoints a csv_to_zip.py run in ``<output>.journal/`` so that an interrupted
+conversion can be resumed with ``--resume`` instead of starting over:
+
+- ``journal.jsonl`` is an append-only log of finished steps: the job plan, the
+  decoded rows, each hashed media file and each ZIP entry written.
+- ``manifest.json`` and ``minerals.json`` hold the encoded payload, so the
+  CSV is not re-parsed and generated ids, timestamps and encryption salt stay
+  the same.
+
+Every value that would differ between runs (export time, UUIDs, salt/IV,
+entry timestamps) is fixed by the journal, so a resumed run produces the same
+archive bytes as an uninterrupted one. The plan of an encrypted job keeps a
+salted PBKDF2 check value of the password, so a resume with another password
+is refused instead of reusing ciphertext the new password cannot open.
+
+Records are flushed after every step, which survives the process being
+killed; it does not guard against power loss.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import shutil
+import zipfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+JOURNAL_VERSION = 2
+# Matches the key derivation of encrypted exports; the check salt is separate
+PASSWORD_CHECK_ITERATIONS = 100000
+
+# ZipInfo attributes needed to rebuild the central directory entry of a finished member
+_ZIPINFO_FIELDS = ('filename', 'date_time', 'compress_type', 'CRC', 'compress_size', 'file_size',
+                   'header_offset', 'flag_bits', 'create_system', 'create_version',
+                   'extract_version', 'reserved', 'internal_attr', 'external_attr')
+
+
+class JournalError(Exception):
+    """Raised when a journal cannot be used to resume a job."""
+
+
+class ConversionJournal:
+    """Append-only checkpoint log of one conversion job."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.plan: Optional[Dict[str, Any]] = None
+        self.rows: Optional[int] = None
+        self.media: Dict[str, Tuple[int, int, str]] = {}
+        self.entries: List[Dict[str, Any]] = []
+        self._log = None
+
+    @classmethod
+    def for_output(cls, output_path: Path) -> 'ConversionJournal':
+        return cls(output_path.with_name(output_path.name + '.journal'))
+
+    @property
+    def log_path(self) -> Path:
+        return self.directory / 'journal.jsonl'
+
+    def start(self, plan: Dict[str, Any], resume: bool = False, password: Optional[str] = None) -> None:
+        """Open the journal, replaying it when resuming, or starting fresh otherwise."""
+        if resume and self.log_path.exists():
+            self._replay()
+            recorded = {k: v for k, v in self.plan.items() if k not in ('startedAt', 'passwordCheck')}
+            if recorded != plan:
+                raise JournalError(f"{self.directory}: journal belongs to a different job; "
+                                   "run again without --resume")
+            check = self.plan.get('passwordCheck')
+            if check is not None and not (
+                    password is not None
+                    and hmac.compare_digest(password_check(password, check['saltHex']), check['hash'])):
+                raise JournalError(f"{self.directory}: password differs from the interrupted run; "
+                                   "use the same password or run again without --resume")
+        else:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory.mkdir(parents=True)
+            self.plan = dict(plan, startedAt=datetime.now(timezone.utc).isoformat())
+            if password is not None:
+                salt_hex = os.urandom(16).hex()
+                self.plan['passwordCheck'] = {'saltHex': salt_hex, 'hash': password_check(password, salt_hex)}
+            self._append({'event': 'plan', 'version': JOURNAL_VERSION, **self.plan})
+
+        if self.entries:
+            # Drop whatever an interrupted run wrote after the last finished entry
+            output = Path(self.plan['output'])
+            end = self.entries[-1]['end']
+            if not output.exists() or output.stat().st_size < end:
+                raise JournalError(f"{output}: partial archive is missing or shorter than journaled; "
+                                   "run again without --resume")
+            with open(output, 'r+b') as f:
+                f.truncate(end)
+        self._log = open(self.log_path, 'a', encoding='utf-8')
+
+    @property
+    def started_at(self) -> str:
+        return self.plan['startedAt']
+
+    @property
+    def zip_date_time(self) -> Tuple[int, ...]:
+        """Timestamp shared by every entry of the archive."""
+        return datetime.fromisoformat(self.started_at).timetuple()[:6]
+
+    def _replay(self) -> None:
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        for number, line in enumerate(lines):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if number < len(lines) - 1:
+                    raise JournalError(f"{self.log_path}: corrupt record on line {number + 1}")
+                # Record torn by the interruption: drop it before appending again
+                self.log_path.write_text(''.join(l + '\n' for l in lines[:-1]), encoding='utf-8')
+                break
+            event = record.pop('event')
+            if event == 'plan':
+                if record.pop('version') != JOURNAL_VERSION:
+                    raise JournalError(f"{self.log_path}: unsupported journal version")
+                self.plan = record
+            elif event == 'rows':
+                self.rows = record['count']
+            elif event == 'media':
+                self.media[record['path']] = (record['size'], record['mtimeNs'], record['sha256'])
+            elif event == 'entry':
+                self.entries.append(record)
+        if self.plan is None:
+            raise JournalError(f"{self.log_path}: missing job plan")
+        if self.rows is not None and not (self.directory / 'minerals.json').exists():
+            self.rows = None
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        log = self._log or open(self.log_path, 'a', encoding='utf-8')
+        log.write(json.dumps(record, separators=(',', ':')) + '\n')
+        log.flush()
+        if log is not self._log:
+            log.close()
+
+    # --- Rows decoded -------------------------------------------------------
+
+    def load_payload(self) -> Optional[Tuple[Dict[str, Any], bytes]]:
+        """Return the (manifest, minerals.json payload) of a finished decode step."""
+        if self.rows is None:
+            return None
+        manifest = json.loads((self.directory / 'manifest.json').read_text(encoding='utf-8'))
+        return manifest, (self.directory / 'minerals.json').read_bytes()
+
+    def record_payload(self, manifest: Dict[str, Any], payload: bytes, rows: int) -> None:
+        (self.directory / 'manifest.json').write_text(json.dumps(manifest), encoding='utf-8')
+        (self.directory / 'minerals.json').write_bytes(payload)
+        self.rows = rows
+        self._append({'event': 'rows', 'count': rows})
+
+    # --- Media hashed -------------------------------------------------------
+
+    def media_sha256(self, path: Path) -> Optional[str]:
+        """Return the journaled hash of a media file if it has not changed since."""
+        known = self.media.get(str(path))
+        if known is None:
+            return None
+        stat = path.stat()
+        return known[2] if (stat.st_size, stat.st_mtime_ns) == known[:2] else None
+
+    def record_media(self, path: Path, sha256: str) -> None:
+        stat = path.stat()
+        self.media[str(path)] = (stat.st_size, stat.st_mtime_ns, sha256)
+        self._append({'event': 'media', 'path': str(path), 'size': stat.st_size,
+                      'mtimeNs': stat.st_mtime_ns, 'sha256': sha256})
+
+    # --- Entries written ----------------------------------------------------
+
+    def finished_entry(self, index: int, name: str) -> Optional[zipfile.ZipInfo]:
+        """Return the ZipInfo of entry ``index`` if a previous run finished writing it."""
+        if index >= len(self.entries):
+            return None
+        record = self.entries[index]
+        if record['filename'] != name:
+            raise JournalError(f"{self.log_path}: entry {index} was {record['filename']!r}, expected {name!r}")
+        zinfo = zipfile.ZipInfo(name, tuple(record['date_time']))
+        for field in _ZIPINFO_FIELDS[2:]:
+            setattr(zinfo, field, record[field])
+        zinfo.extra = bytes.fromhex(record['extra'])
+        return zinfo
+
+    def record_entry(self, zinfo: zipfile.ZipInfo, end: int) -> None:
+        record = {field: getattr(zinfo, field) for field in _ZIPINFO_FIELDS}
+        record['extra'] = zinfo.extra.hex()
+        record['end'] = end
+        self.entries.append(record)
+        self._append({'event': 'entry', **record})
+
+    def finish(self) -> None:
+        """Close and delete the journal once the archive is complete."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def close(self) -> None:
+        """Close the journal but keep it for a later --resume."""
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+def password_check(password: str, salt_hex: str) -> str:
+    """Check value of a password, so a resume can tell it apart without storing it."""
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), bytes.fromhex(salt_hex),
+                               PASSWORD_CHECK_ITERATIONS).hex()
+
+
+def plan_for(input_path: Path, output_path: Path, media_dir: Optional[Path], encrypted: bool,
+             reference_path: Optional[Path] = None, photos_path: Optional[Path] = None) -> Dict[str, Any]:
+    """Describe a job so a resume can check it is continuing the same one."""
+    stat = input_path.stat()
+    return {
+        'input': str(input_path.resolve()),
+        'inputSize': stat.st_size,
+        'inputMtimeNs': stat.st_mtime_ns,
+        'output': str(output_path.resolve()),
+        'mediaDir': str(media_dir.resolve()) if media_dir else None,
+        'encrypted': encrypted,
+        'reference': str(reference_path.resolve()) if reference_path else None,
+        'photos': str(photos_path.resolve()) if photos_path else None,
+    }
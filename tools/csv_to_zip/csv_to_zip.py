@@ -6,114 +6,164 @@ Converts CSV files to MineraLog ZIP export format.
 Usage:
     python csv_to_zip.py -i minerals.csv -o export.zip
     python csv_to_zip.py -i minerals.csv -o export.zip --encrypt --password secret
+    python csv_to_zip.py -i minerals.csv -o export.zip --media-dir ./media --resume
+    python csv_to_zip.py -i minerals.csv -o export.zip --photos photos.csv --media-dir ./media
+    python csv_to_zip.py -i minerals.csv -o export.zip --reference reference_minerals_v6.json
 """
 
 import argparse
 import csv
 import hashlib
+import importlib.util
 import json
+import shutil
 import sys
+import time
 import zipfile
+import zlib
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, Union
 import uuid
 
-try:
-    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    from cryptography.hazmat.primitives import hashes
-    from cryptography.hazmat.backends import default_backend
-    CRYPTO_AVAILABLE = True
-except ImportError:
-    CRYPTO_AVAILABLE = False
-    print("Warning: cryptography module not installed. Encryption disabled.", file=sys.stderr)
+from conversion_journal import ConversionJournal, JournalError, plan_for
+from mineral_records import Mineral, Photo, dump_json_array
+from reference_csv import ReferenceCsv
+
+PROVENANCE_COLUMNS = ('site', 'locality', 'country', 'lat', 'lon')
+STORAGE_COLUMNS = ('place', 'container', 'box', 'slot')
+COPY_CHUNK_SIZE = 1 << 20
+
+# (archive path, SHA-256 hex, opener returning a binary stream)
+MediaEntry = Tuple[str, str, Callable[[], BinaryIO]]
+
+
+def _text(row: Dict[str, str], key: str) -> Optional[str]:
+    return row.get(key) or None
+
 
+def _number(row: Dict[str, str], key: str) -> Optional[float]:
+    value = row.get(key)
+    return float(value) if value else None
 
-def parse_csv(csv_path: Path) -> List[Dict]:
-    """Parse minerals CSV file."""
+
+def _flag(row: Dict[str, str], key: str) -> bool:
+    return row.get(key, '').lower() in ('true', '1', 'yes')
+
+
+def parse_csv(csv_path: Path, now: Optional[str] = None) -> List[Mineral]:
+    """Parse minerals CSV file; ``now`` is the default for missing timestamps."""
     minerals = []
+    now = now or datetime.now(timezone.utc).isoformat()
     with open(csv_path, 'r', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for row in reader:
-            mineral = {
-                'id': row.get('id', str(uuid.uuid4())),
-                'name': row['name'],
-                'group': row.get('group') or None,
-                'formula': row.get('formula') or None,
-                'crystalSystem': row.get('crystalSystem') or None,
-                'mohsMin': float(row['mohsMin']) if row.get('mohsMin') else None,
-                'mohsMax': float(row['mohsMax']) if row.get('mohsMax') else None,
-                'cleavage': row.get('cleavage') or None,
-                'fracture': row.get('fracture') or None,
-                'luster': row.get('luster') or None,
-                'streak': row.get('streak') or None,
-                'diaphaneity': row.get('diaphaneity') or None,
-                'habit': row.get('habit') or None,
-                'specificGravity': float(row['specificGravity']) if row.get('specificGravity') else None,
-                'fluorescence': row.get('fluorescence') or None,
-                'magnetic': row.get('magnetic', '').lower() in ('true', '1', 'yes'),
-                'radioactive': row.get('radioactive', '').lower() in ('true', '1', 'yes'),
-                'dimensionsMm': row.get('dimensionsMm') or None,
-                'weightGr': float(row['weightGr']) if row.get('weightGr') else None,
-                'notes': row.get('notes') or None,
-                'tags': row.get('tags', '').split(',') if row.get('tags') else [],
-                'status': row.get('status', 'incomplete'),
-                'createdAt': row.get('createdAt', datetime.now(timezone.utc).isoformat()),
-                'updatedAt': row.get('updatedAt', datetime.now(timezone.utc).isoformat()),
-            }
+            mineral = Mineral(
+                id=row.get('id', str(uuid.uuid4())),
+                name=row['name'],
+                group=_text(row, 'group'),
+                formula=_text(row, 'formula'),
+                crystalSystem=_text(row, 'crystalSystem'),
+                mohsMin=_number(row, 'mohsMin'),
+                mohsMax=_number(row, 'mohsMax'),
+                cleavage=_text(row, 'cleavage'),
+                fracture=_text(row, 'fracture'),
+                luster=_text(row, 'luster'),
+                streak=_text(row, 'streak'),
+                diaphaneity=_text(row, 'diaphaneity'),
+                habit=_text(row, 'habit'),
+                specificGravity=_number(row, 'specificGravity'),
+                fluorescence=_text(row, 'fluorescence'),
+                magnetic=_flag(row, 'magnetic'),
+                radioactive=_flag(row, 'radioactive'),
+                dimensionsMm=_text(row, 'dimensionsMm'),
+                weightGr=_number(row, 'weightGr'),
+                notes=_text(row, 'notes'),
+                tags=row['tags'].split(',') if row.get('tags') else None,
+                status=row.get('status', 'incomplete'),
+                createdAt=row.get('createdAt', now),
+                updatedAt=row.get('updatedAt', now),
+            )
 
             # Add provenance if present
-            if any(row.get(f) for f in ['site', 'locality', 'country', 'lat', 'lon']):
-                mineral['provenance'] = {
-                    'id': str(uuid.uuid4()),
-                    'mineralId': mineral['id'],
-                    'site': row.get('site') or None,
-                    'locality': row.get('locality') or None,
-                    'country': row.get('country') or None,
-                    'latitude': float(row['lat']) if row.get('lat') else None,
-                    'longitude': float(row['lon']) if row.get('lon') else None,
-                    'acquiredAt': row.get('acquiredAt') or None,
-                    'source': row.get('source') or None,
-                    'price': float(row['price']) if row.get('price') else None,
-                    'estimatedValue': float(row['estimatedValue']) if row.get('estimatedValue') else None,
-                }
-            else:
-                mineral['provenance'] = None
+            if any(row.get(f) for f in PROVENANCE_COLUMNS):
+                provenance = mineral.ensure_provenance()
+                provenance.site = _text(row, 'site')
+                provenance.locality = _text(row, 'locality')
+                provenance.country = _text(row, 'country')
+                provenance.latitude = _number(row, 'lat')
+                provenance.longitude = _number(row, 'lon')
+                provenance.acquiredAt = _text(row, 'acquiredAt')
+                provenance.source = _text(row, 'source')
+                provenance.price = _number(row, 'price')
+                provenance.estimatedValue = _number(row, 'estimatedValue')
 
             # Add storage if present
-            if any(row.get(f) for f in ['place', 'container', 'box', 'slot']):
-                mineral['storage'] = {
-                    'id': str(uuid.uuid4()),
-                    'mineralId': mineral['id'],
-                    'place': row.get('place') or None,
-                    'container': row.get('container') or None,
-                    'box': row.get('box') or None,
-                    'slot': row.get('slot') or None,
-                    'nfcTagId': None,
-                    'qrContent': f"mineralapp://mineral/{mineral['id']}"
-                }
-            else:
-                mineral['storage'] = None
-
-            mineral['photos'] = []
+            if any(row.get(f) for f in STORAGE_COLUMNS):
+                storage = mineral.ensure_storage()
+                storage.place = _text(row, 'place')
+                storage.container = _text(row, 'container')
+                storage.box = _text(row, 'box')
+                storage.slot = _text(row, 'slot')
+
             minerals.append(mineral)
 
     return minerals
 
 
+def parse_photos(photos_path: Path, minerals: List[Mineral]) -> None:
+    """Attach the rows of a photos CSV file to their minerals, by ``mineralId``."""
+    by_id = {mineral.id: mineral for mineral in minerals}
+    unknown = 0
+    with open(photos_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            mineral = by_id.get(row.get('mineralId'))
+            if mineral is None:
+                unknown += 1
+                continue
+            mineral.add_photo(Photo(
+                type=_text(row, 'type'),
+                caption=_text(row, 'caption'),
+                takenAt=_text(row, 'takenAt'),
+                fileName=_text(row, 'fileName'),
+            ))
+    if unknown:
+        print(f"Warning: {unknown} photo row(s) refer to no mineral id of the input and were skipped",
+              file=sys.stderr)
+
+
 def create_checksums(files: Dict[str, bytes]) -> str:
     """Create checksums.sha256 content."""
-    lines = []
-    for path, content in files.items():
-        sha256 = hashlib.sha256(content).hexdigest()
-        lines.append(f"{path};{sha256}")
-    return '\n'.join(lines)
+    return format_checksums({path: hashlib.sha256(content).hexdigest() for path, content in files.items()})
+
+
+def format_checksums(checksums: Dict[str, str]) -> str:
+    """Format a path -> SHA-256 hex mapping as checksums.sha256 content."""
+    return '\n'.join(f"{path};{sha256}" for path, sha256 in checksums.items())
+
+
+def crypto_available() -> bool:
+    """Whether the optional cryptography module is installed, without importing it."""
+    return importlib.util.find_spec('cryptography') is not None
+
+
+def require_crypto() -> None:
+    """Exit with an error if encryption is requested but cryptography is missing."""
+    if not crypto_available():
+        print("Error: Encryption requires 'cryptography' module", file=sys.stderr)
+        print("Install: pip install cryptography", file=sys.stderr)
+        sys.exit(1)
 
 
 def derive_key(password: str, salt: bytes) -> bytes:
     """Derive encryption key from password using PBKDF2."""
-    if not CRYPTO_AVAILABLE:
+    # Imported on first use: cryptography is slow to import and only needed for encrypted archives
+    try:
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.backends import default_backend
+    except ImportError:
         raise RuntimeError("Encryption requires cryptography module")
 
     kdf = PBKDF2HMAC(
@@ -128,44 +178,52 @@ def derive_key(password: str, salt: bytes) -> bytes:
 
 def encrypt_content(content: bytes, password: str) -> tuple:
     """Encrypt content with AES-256-GCM."""
-    if not CRYPTO_AVAILABLE:
-        raise RuntimeError("Encryption requires cryptography module")
-
     import os
     salt = os.urandom(16)
     iv = os.urandom(12)
     key = derive_key(password, salt)
 
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
     aesgcm = AESGCM(key)
     ciphertext = aesgcm.encrypt(iv, content, None)
 
     return ciphertext, salt.hex(), iv.hex()
 
 
-def create_zip(minerals: List[Dict], output_path: Path, password: Optional[str] = None,
-               media_dir: Optional[Path] = None):
-    """Create ZIP export file."""
+def decrypt_content(ciphertext: bytes, password: str, salt_hex: str, iv_hex: str) -> bytes:
+    """Decrypt content produced by encrypt_content()."""
+    key = derive_key(password, bytes.fromhex(salt_hex))
+
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    return AESGCM(key).decrypt(bytes.fromhex(iv_hex), ciphertext, None)
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
 
-    # Create minerals.json
-    minerals_json = json.dumps(minerals, indent=2, ensure_ascii=False).encode('utf-8')
 
-    # Create manifest
+def build_manifest(minerals_json: bytes, mineral_count: int, photo_count: int,
+                   password: Optional[str] = None, exported_at: Optional[str] = None) -> Tuple[Dict, bytes]:
+    """Return (manifest, minerals.json payload), encrypting the payload if a password is given."""
     manifest = {
         'app': 'MineraLog',
         'schemaVersion': '1.0.0',
-        'exportedAt': datetime.now(timezone.utc).isoformat(),
+        'exportedAt': exported_at or datetime.now(timezone.utc).isoformat(),
         'counts': {
-            'minerals': len(minerals),
-            'photos': sum(len(m.get('photos', [])) for m in minerals)
+            'minerals': mineral_count,
+            'photos': photo_count
         },
         'encrypted': password is not None
     }
 
     if password:
-        if not CRYPTO_AVAILABLE:
-            print("Error: Encryption requires 'cryptography' module", file=sys.stderr)
-            print("Install: pip install cryptography", file=sys.stderr)
-            sys.exit(1)
+        require_crypto()
 
         encrypted_json, salt_hex, iv_hex = encrypt_content(minerals_json, password)
         minerals_json = encrypted_json
@@ -178,37 +236,154 @@ def create_zip(minerals: List[Dict], output_path: Path, password: Optional[str]
         manifest['cipher'] = 'AES-256-GCM'
         manifest['ivHex'] = iv_hex
 
-    manifest_json = json.dumps(manifest, indent=2).encode('utf-8')
-
-    # Build file map
-    files = {
-        'minerals.json': minerals_json
-    }
-
-    # Add media files if directory provided
+    return manifest, minerals_json
+
+
+def write_archive(output_path: Path, manifest: Dict, minerals_json: bytes, media: Iterable[MediaEntry],
+                  date_time: Optional[Tuple[int, ...]] = None, journal: Optional[ConversionJournal] = None):
+    """
+    Write a MineraLog ZIP archive.
+
+    Media entries are (archive path, SHA-256 hex, opener) tuples; each file is
+    streamed from its opener into the archive, never held in memory whole.
+    With a journal, every finished entry is checkpointed and entries finished
+    by an interrupted run are kept instead of being written again.
+    """
+    media = list(media)
+    checksums = {'minerals.json': hashlib.sha256(minerals_json).hexdigest()}
+    for path, sha256, _ in media:
+        checksums[path] = sha256
+
+    entries: List[Tuple[str, Union[bytes, Callable[[], BinaryIO]]]] = [
+        ('manifest.json', json.dumps(manifest, indent=2).encode('utf-8')),
+        ('checksums.sha256', format_checksums(checksums).encode('utf-8')),
+        ('minerals.json', minerals_json),
+    ]
+    entries.extend((path, opener) for path, _, opener in media)
+
+    if date_time is None:
+        date_time = time.localtime(time.time())[:6]
+    resuming = journal is not None and bool(journal.entries)
+
+    with open(output_path, 'r+b' if resuming else 'wb') as fp:
+        fp.seek(0, 2)
+        with zipfile.ZipFile(fp, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for index, (path, content) in enumerate(entries):
+                finished = journal.finished_entry(index, path) if journal is not None else None
+                if finished is not None:
+                    if isinstance(content, bytes) and zlib.crc32(content) != finished.CRC:
+                        raise JournalError(f"{path} differs from the interrupted run; run again without --resume")
+                    zf.filelist.append(finished)
+                    zf.NameToInfo[path] = finished
+                    continue
+
+                zinfo = zipfile.ZipInfo(path, date_time)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                zinfo.external_attr = 0o600 << 16
+                if isinstance(content, bytes):
+                    zf.writestr(zinfo, content)
+                else:
+                    with content() as src, zf.open(zinfo, 'w') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                if journal is not None:
+                    fp.flush()
+                    journal.record_entry(zinfo, fp.tell())
+
+
+def media_dir_entries(media_dir: Path, journal: Optional[ConversionJournal] = None) -> List[MediaEntry]:
+    """Media entries for every file below a directory, stored under media/."""
+    entries = []
+    for media_file in sorted(media_dir.rglob('*')):
+        if media_file.is_file():
+            rel_path = media_file.relative_to(media_dir).as_posix()
+            sha256 = journal.media_sha256(media_file) if journal is not None else None
+            if sha256 is None:
+                sha256 = file_sha256(media_file)
+                if journal is not None:
+                    journal.record_media(media_file, sha256)
+            entries.append((f"media/{rel_path}", sha256, partial(open, media_file, 'rb')))
+    return entries
+
+
+def scan_reference(reference_path: Path) -> ReferenceCsv:
+    """Hash the reference_minerals.csv built from ``reference_path``, warning about unreadable values."""
+    reference = ReferenceCsv.scan(reference_path)
+    if reference.unreadable:
+        print(f"Warning: {len(reference.unreadable)} reference row(s) contain quotes that the app's "
+              f"CSV parser will not read back as written:", file=sys.stderr)
+        for mineral_id, column in reference.unreadable:
+            print(f"  {mineral_id}: {column}", file=sys.stderr)
+    return reference
+
+
+def trailing_entries(media_dir: Optional[Path], reference_path: Optional[Path],
+                     journal: Optional[ConversionJournal] = None) -> Tuple[List[MediaEntry], Optional[ReferenceCsv]]:
+    """Entries written after minerals.json: reference_minerals.csv, as the app places it, then the media."""
+    reference = scan_reference(reference_path) if reference_path else None
+    entries = [reference.entry()] if reference else []
     if media_dir and media_dir.exists():
-        for media_file in media_dir.rglob('*'):
-            if media_file.is_file():
-                rel_path = media_file.relative_to(media_dir)
-                files[f"media/{rel_path}"] = media_file.read_bytes()
+        entries.extend(media_dir_entries(media_dir, journal))
+    return entries, reference
 
-    # Create checksums
-    checksums = create_checksums(files)
-
-    # Write ZIP
-    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr('manifest.json', manifest_json)
-        zf.writestr('checksums.sha256', checksums)
-        for path, content in files.items():
-            zf.writestr(path, content)
 
+def print_summary(output_path: Path, manifest: Dict, reference: Optional[ReferenceCsv]) -> None:
+    """Report a finished export."""
     print(f"✓ Created {output_path}")
-    print(f"  Minerals: {len(minerals)}")
+    print(f"  Minerals: {manifest['counts']['minerals']}")
     print(f"  Photos: {manifest['counts']['photos']}")
+    if reference:
+        print(f"  Reference minerals: {reference.rows}")
     print(f"  Encrypted: {manifest['encrypted']}")
 
 
-def main():
+def create_zip(minerals: List[Mineral], output_path: Path, password: Optional[str] = None,
+               media_dir: Optional[Path] = None, reference_path: Optional[Path] = None):
+    """Create ZIP export file."""
+    manifest, minerals_json = build_manifest(
+        dump_json_array(minerals), len(minerals), sum(m.photo_count for m in minerals), password
+    )
+    entries, reference = trailing_entries(media_dir, reference_path)
+    write_archive(output_path, manifest, minerals_json, entries)
+    print_summary(output_path, manifest, reference)
+
+
+def convert(input_path: Path, output_path: Path, password: Optional[str] = None,
+            media_dir: Optional[Path] = None, resume: bool = False, reference_path: Optional[Path] = None,
+            photos_path: Optional[Path] = None):
+    """Convert a CSV file to a ZIP export, checkpointing progress so it can be resumed."""
+    if password:
+        # Before the journal exists, so a failed run leaves nothing behind
+        require_crypto()
+    journal = ConversionJournal.for_output(output_path)
+    journal.start(plan_for(input_path, output_path, media_dir, password is not None, reference_path,
+                           photos_path), resume, password)
+    try:
+        payload = journal.load_payload()
+        if payload is None:
+            print(f"Reading {input_path}...")
+            minerals = parse_csv(input_path, now=journal.started_at)
+            if photos_path is not None:
+                parse_photos(photos_path, minerals)
+            manifest, minerals_json = build_manifest(
+                dump_json_array(minerals), len(minerals), sum(m.photo_count for m in minerals),
+                password, exported_at=journal.started_at
+            )
+            journal.record_payload(manifest, minerals_json, len(minerals))
+        else:
+            manifest, minerals_json = payload
+            print(f"Resuming {output_path}: {journal.rows} rows decoded, {len(journal.entries)} entries written")
+
+        print("Creating ZIP export...")
+        entries, reference = trailing_entries(media_dir, reference_path, journal)
+        write_archive(output_path, manifest, minerals_json, entries, journal.zip_date_time, journal)
+    except BaseException:
+        journal.close()
+        raise
+    journal.finish()
+    print_summary(output_path, manifest, reference)
+
+
+def main(argv: Optional[List[str]] = None):
     parser = argparse.ArgumentParser(description='Convert CSV to MineraLog ZIP export')
     parser.add_argument('-i', '--input', required=True, type=Path, help='Input CSV file')
     parser.add_argument('-o', '--output', required=True, type=Path, help='Output ZIP file')
@@ -216,22 +391,35 @@ def main():
     parser.add_argument('--media-dir', type=Path, help='Directory containing media files')
     parser.add_argument('--encrypt', action='store_true', help='Encrypt the export')
     parser.add_argument('--password', type=str, help='Encryption password')
+    parser.add_argument('--reference', type=Path,
+                        help='Reference library JSON or CSV to include as reference_minerals.csv')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted conversion from its journal')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     if not args.input.exists():
         print(f"Error: Input file not found: {args.input}", file=sys.stderr)
         sys.exit(1)
 
+    if args.photos and not args.photos.exists():
+        print(f"Error: Photos file not found: {args.photos}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.reference and not args.reference.exists():
+        print(f"Error: Reference file not found: {args.reference}", file=sys.stderr)
+        sys.exit(1)
+
     if args.encrypt and not args.password:
         import getpass
         args.password = getpass.getpass("Enter encryption password: ")
 
-    print(f"Reading {args.input}...")
-    minerals = parse_csv(args.input)
-
-    print(f"Creating ZIP export...")
-    create_zip(minerals, args.output, args.password, args.media_dir)
+    try:
+        convert(args.input, args.output, args.password, args.media_dir, args.resume, args.reference,
+                args.photos)
+    except JournalError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
     print("Done!")
 
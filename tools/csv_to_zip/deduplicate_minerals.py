@@ -13,18 +13,22 @@ Strategy:
     - Conflict resolution: Merge entries keeping most complete fields
     - Description priority: Keep longest description
     - Add v6 fields: imageUrl and localIconName (initialized to null/"")
+    - Write the dropped ids with their surviving id to <output>.idmap.csv
 
 Author: MineraLog Development Team
 Version: 3.3.0
 Date: 2025-11-20
 """
 
+import argparse
 import json
 import sys
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from collections import defaultdict
 
+from reference_id_map import build_id_map, id_map_path, write_id_map
+
 
 def normalize_name(name: str) -> str:
     """
@@ -222,7 +226,14 @@ def deduplicate_minerals(input_path: Path, output_path: Path) -> None:
         else:
             deduplicated.append(entries[0])
 
+    # merge_minerals keeps the base entry's id; the other ids of each group map to it
+    id_map = build_id_map(
+        ([m.get('id') for m in entries] for entries in grouped.values()),
+        (m.get('id') for m in deduplicated),
+    )
+
     print(f"   ✓ Merged {merge_count} duplicate groups")
+    print(f"   ✓ Remapped {len(id_map)} dropped ids")
     final_count = len(deduplicated)
     print(f"   ✓ Result: {final_count} unique minerals")
     print()
@@ -266,6 +277,15 @@ def deduplicate_minerals(input_path: Path, output_path: Path) -> None:
         print(f"   ❌ ERROR: Failed to write file: {e}")
         sys.exit(1)
 
+    map_path = id_map_path(output_path)
+    print(f"💾 Writing: {map_path}")
+    try:
+        write_id_map(map_path, id_map)
+        print(f"   ✓ {len(id_map)} old ids mapped to their surviving id")
+    except OSError as e:
+        print(f"   ❌ ERROR: Failed to write id map: {e}")
+        sys.exit(1)
+
     # Final statistics
     print()
     print("=" * 80)
@@ -274,6 +294,7 @@ def deduplicate_minerals(input_path: Path, output_path: Path) -> None:
     print(f"Input (v5):        {original_count} minerals")
     print(f"Duplicates found:  {duplicate_count} names ({total_duplicate_entries} entries)")
     print(f"Merged groups:     {merge_count}")
+    print(f"Remapped ids:      {len(id_map)}")
     print(f"Output (v6):       {final_count} minerals")
     print(f"Reduction:         -{original_count - final_count} entries ({((original_count - final_count) / original_count * 100):.1f}%)")
     print()
@@ -281,19 +302,25 @@ def deduplicate_minerals(input_path: Path, output_path: Path) -> None:
     print("=" * 80)
 
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """Main entry point."""
-    # Paths
-    project_root = Path(__file__).parent
-    assets_dir = project_root / "app" / "src" / "main" / "assets"
+    # Paths default to the app assets, relative to the repository root
+    assets_dir = Path("app") / "src" / "main" / "assets"
+
+    parser = argparse.ArgumentParser(description="Deduplicate the MineraLog reference minerals library")
+    parser.add_argument('-i', '--input', type=Path, default=assets_dir / "reference_minerals_v5.json",
+                        help="Input reference JSON (default: %(default)s)")
+    parser.add_argument('-o', '--output', type=Path, default=assets_dir / "reference_minerals_v6.json",
+                        help="Output reference JSON (default: %(default)s)")
+    args = parser.parse_args(argv)
 
-    input_file = assets_dir / "reference_minerals_v5.json"
-    output_file = assets_dir / "reference_minerals_v6.json"
+    input_file = args.input
+    output_file = args.output
 
     # Check input file exists
     if not input_file.exists():
         print(f"❌ ERROR: Input file not found: {input_file}")
-        print(f"   Please ensure reference_minerals_v5.json exists in {assets_dir}")
+        print(f"   Please ensure {input_file.name} exists in {input_file.parent}")
         sys.exit(1)
 
     # Run deduplication
@@ -1,7 +1,11 @@
+import argparse
 import json
 import uuid
+from collections import defaultdict
 from datetime import datetime
 
+from reference_id_map import build_id_map, id_map_path, write_id_map
+
 # --- CONFIGURATION ---
 INPUT_FILE = 'app/src/main/assets/reference_minerals_v5.json'
 OUTPUT_FILE = 'app/src/main/assets/reference_minerals_v6.json'
@@ -210,9 +214,9 @@ NEW_DATA = [
 
 # --- FONCTIONS DE TRAITEMENT ---
 
-def clean_and_enrich():
+def clean_and_enrich(input_file=INPUT_FILE, output_file=OUTPUT_FILE):
     try:
-        with open(INPUT_FILE, 'r', encoding='utf-8') as f:
+        with open(input_file, 'r', encoding='utf-8') as f:
             data = json.load(f)
         
         minerals = data.get('minerals', [])
@@ -221,6 +225,8 @@ def clean_and_enrich():
         # 1. Dictionnaire pour dédoublonnage (clé = nom français)
         # On garde le minéral qui a le plus de champs remplis
         mineral_map = {}
+        # Ids vus par clé, pour la table ancien id -> id conservé
+        ids_by_key = defaultdict(list)
         
         for m in minerals:
             # Correction taxonomie Wolframite/Scheelite/Wulfenite
@@ -234,6 +240,7 @@ def clean_and_enrich():
                     print(f"Correction groupe pour {m['nameFr']}")
 
             key = m['nameFr'].lower().strip()
+            ids_by_key[key].append(m.get('id'))
             
             # Logique de fusion : si on a déjà ce minéral, on garde celui qui a une description/careInstructions
             if key in mineral_map:
@@ -282,14 +289,28 @@ def clean_and_enrich():
             "minerals": final_list
         }
 
-        with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
+        with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(output_data, f, ensure_ascii=False, indent=2)
             
-        print(f"SUCCÈS : {len(final_list)} minéraux exportés dans {OUTPUT_FILE}")
+        # 4. Table des ids abandonnés -> id conservé, à côté de l'asset
+        id_map = build_id_map(ids_by_key.values(), (mineral_map[key].get('id') for key in ids_by_key))
+        map_file = id_map_path(output_file)
+        write_id_map(map_file, id_map)
+
+        print(f"SUCCÈS : {len(final_list)} minéraux exportés dans {output_file}")
+        print(f"Table de correspondance : {len(id_map)} id(s) remplacé(s) dans {map_file}")
         print("Les doublons ont été fusionnés, les groupes corrigés et les manquants ajoutés.")
 
     except Exception as e:
         print(f"ERREUR : {str(e)}")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fusionne les doublons et enrichit la bibliothèque de référence")
+    parser.add_argument('-i', '--input', default=INPUT_FILE, help=f"Fichier JSON source (défaut : {INPUT_FILE})")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help=f"Fichier JSON produit (défaut : {OUTPUT_FILE})")
+    args = parser.parse_args(argv)
+    clean_and_enrich(args.input, args.output)
+
+
 if __name__ == "__main__":
-    clean_and_enrich()
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+MineraLog Geospatial Index
+Builds a geohash index of specimens from provenance coordinates, with
+precomputed locality clusters per zoom level, and answers bounding-box and
+radius queries.
+
+Usage:
+    python geo_index.py -i minerals.csv -o specimens.geo.json.gz
+    python geo_index.py -i export.zip -o specimens.geo.json.gz --password secret
+    python geo_index.py --index specimens.geo.json.gz --bbox 40 -5 52 10
+    python geo_index.py --index specimens.geo.json.gz --near 45.76 4.84 50
+"""
+
+import argparse
+import gzip
+import json
+import math
+import sys
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+DEFAULT_PRECISION = 8
+DEFAULT_LEVELS = (1, 2, 3, 4, 5, 6)
+EARTH_RADIUS_KM = 6371.0088
+INDEX_FORMAT = 'mineralog-geo-index'
+INDEX_VERSION = 1
+
+# Upper bound on geohash cells visited per query; coarser cells are used beyond it
+MAX_QUERY_CELLS = 64
+
+# (geohash, latitude, longitude, mineral id, mineral name)
+Point = Tuple[str, float, float, str, Optional[str]]
+# (geohash prefix, specimen count, mean latitude, mean longitude)
+Cluster = Tuple[str, int, float, float]
+
+
+def encode_geohash(lat: float, lon: float, precision: int = DEFAULT_PRECISION) -> str:
+    """Encode a coordinate as a geohash of the given length."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                value = (value << 1) | 1
+                lon_lo = mid
+            else:
+                value <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                value = (value << 1) | 1
+                lat_lo = mid
+            else:
+                value <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return the (latitude, longitude) extent in degrees of a geohash cell."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two coordinates in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    """Specimen points sorted by geohash, so every geohash cell is a contiguous slice."""
+
+    __slots__ = ('precision', 'points', '_hashes')
+
+    def __init__(self, points: Iterable[Point], precision: int = DEFAULT_PRECISION):
+        self.precision = precision
+        self.points: List[Point] = sorted(points)
+        self._hashes = [p[0] for p in self.points]
+
+    @classmethod
+    def build(cls, coordinates: Iterable[Tuple[str, Optional[str], float, float]],
+              precision: int = DEFAULT_PRECISION) -> 'SpatialIndex':
+        """Index (id, name, latitude, longitude) tuples."""
+        return cls(
+            ((encode_geohash(lat, lon, precision), lat, lon, mineral_id, name)
+             for mineral_id, name, lat, lon in coordinates),
+            precision
+        )
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def clusters(self, level: int) -> List[Cluster]:
+        """Group points by geohash prefix of length ``level``."""
+        result: List[Cluster] = []
+        current = None
+        count = 0
+        lat_sum = lon_sum = 0.0
+        for geohash, lat, lon, _, _ in self.points:
+            prefix = geohash[:level]
+            if prefix != current:
+                if count:
+                    result.append((current, count, lat_sum / count, lon_sum / count))
+                current, count, lat_sum, lon_sum = prefix, 0, 0.0, 0.0
+            count += 1
+            lat_sum += lat
+            lon_sum += lon
+        if count:
+            result.append((current, count, lat_sum / count, lon_sum / count))
+        return result
+
+    def _cover(self, south: float, west: float, north: float, east: float) -> List[str]:
+        """Geohash prefixes covering a bounding box that does not cross the antimeridian."""
+        precision = 1
+        for candidate in range(self.precision, 0, -1):
+            lat_step, lon_step = cell_size(candidate)
+            rows = math.floor((north + 90) / lat_step) - math.floor((south + 90) / lat_step) + 1
+            cols = math.floor((east + 180) / lon_step) - math.floor((west + 180) / lon_step) + 1
+            if rows * cols <= MAX_QUERY_CELLS:
+                precision = candidate
+                break
+
+        lat_step, lon_step = cell_size(precision)
+        cells = []
+        lat = (math.floor((south + 90) / lat_step) + 0.5) * lat_step - 90
+        while lat - lat_step / 2 <= north and lat < 90:
+            lon = (math.floor((west + 180) / lon_step) + 0.5) * lon_step - 180
+            while lon - lon_step / 2 <= east and lon < 180:
+                cells.append(encode_geohash(lat, lon, precision))
+                lon += lon_step
+            lat += lat_step
+        return cells
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> List[Point]:
+        """Return the points inside a bounding box; ``west > east`` crosses the antimeridian."""
+        if west > east:
+            return self.query_bbox(south, west, north, 180.0) + self.query_bbox(south, -180.0, north, east)
+
+        south, north = max(south, -90.0), min(north, 90.0)
+        west, east = max(west, -180.0), min(east, 180.0)
+        found = []
+        for prefix in self._cover(south, west, north, east):
+            start = bisect_left(self._hashes, prefix)
+            end = bisect_left(self._hashes, prefix + '~', start)
+            for point in self.points[start:end]:
+                if south <= point[1] <= north and west <= point[2] <= east:
+                    found.append(point)
+        return found
+
+    def query_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, Point]]:
+        """Return (distance, point) pairs within ``radius_km`` of a coordinate, nearest first."""
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        south, north = lat - dlat, lat + dlat
+        # Widest longitude span of a spherical cap, reached off its centre latitude
+        sin_dlon = math.sin(angle) / math.cos(math.radians(lat))
+        if south <= -90 or north >= 90 or angle >= math.pi / 2 or sin_dlon >= 1:
+            west, east = -180.0, 180.0
+        else:
+            dlon = math.degrees(math.asin(sin_dlon))
+            west = (lon - dlon + 540) % 360 - 180
+            east = (lon + dlon + 540) % 360 - 180
+
+        hits = []
+        for point in self.query_bbox(south, west, north, east):
+            distance = haversine_km(lat, lon, point[1], point[2])
+            if distance <= radius_km:
+                hits.append((distance, point))
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def save(self, path: Path, levels: Sequence[int] = DEFAULT_LEVELS) -> None:
+        """Write the index and its clusters as gzip-compressed, column-oriented JSON."""
+        data = {
+            'format': INDEX_FORMAT,
+            'version': INDEX_VERSION,
+            'precision': self.precision,
+            'points': {
+                'id': [p[3] for p in self.points],
+                'name': [p[4] for p in self.points],
+                'lat': [round(p[1], 6) for p in self.points],
+                'lon': [round(p[2], 6) for p in self.points],
+            },
+            'clusters': {
+                str(level): [[gh, n, round(lat, 5), round(lon, 5)] for gh, n, lat, lon in self.clusters(level)]
+                for level in levels
+            },
+        }
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path: Path) -> 'SpatialIndex':
+        """Read an index written by save()."""
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('format') != INDEX_FORMAT or data.get('version') != INDEX_VERSION:
+            raise ValueError(f"{path}: not a MineraLog geo index (version {INDEX_VERSION})")
+        points = data['points']
+        return cls.build(zip(points['id'], points['name'], points['lat'], points['lon']), data['precision'])
+
+
+def valid_coordinate(lat: Optional[float], lon: Optional[float]) -> bool:
+    """Coordinates must be set and within lat ∈ [-90, 90], lon ∈ [-180, 180]."""
+    return lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def iter_coordinates(input_path: Path, password: Optional[str] = None
+                     ) -> Iterator[Tuple[str, Optional[str], float, float]]:
+    """Yield (id, name, latitude, longitude) for specimens of a CSV file or ZIP export."""
+    if input_path.suffix.lower() == '.zip':
+        from archive_reader import iter_minerals
+        for mineral in iter_minerals(input_path, password):
+            provenance = mineral.get('provenance') or {}
+            lat, lon = provenance.get('latitude'), provenance.get('longitude')
+            if valid_coordinate(lat, lon):
+                yield mineral['id'], mineral.get('name'), lat, lon
+    else:
+        from csv_to_zip import parse_csv
+        for mineral in parse_csv(input_path):
+            provenance = mineral.provenance
+            if provenance is not None and valid_coordinate(provenance.latitude, provenance.longitude):
+                yield mineral.id, mineral.name, provenance.latitude, provenance.longitude
+
+
+def print_points(points: Iterable[Point], distances: Optional[Dict[str, float]] = None) -> None:
+    for geohash, lat, lon, mineral_id, name in points:
+        suffix = f"  {distances[mineral_id]:.2f} km" if distances else ''
+        print(f"  {mineral_id}  {name or ''}  ({lat:.5f}, {lon:.5f})  {geohash}{suffix}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Build and query a geospatial index of MineraLog specimens')
+    parser.add_argument('-i', '--input', type=Path, help='Input CSV file or ZIP export')
+    parser.add_argument('-o', '--output', type=Path, help='Output index file (.geo.json.gz)')
+    parser.add_argument('--index', type=Path, help='Existing index file to query')
+    parser.add_argument('--password', type=str, help='Password of an encrypted ZIP export')
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION, help='Geohash length of indexed points')
+    parser.add_argument('--levels', type=lambda v: [int(x) for x in v.split(',')],
+                        default=list(DEFAULT_LEVELS), help='Cluster zoom levels (geohash lengths)')
+    parser.add_argument('--bbox', type=float, nargs=4, metavar=('SOUTH', 'WEST', 'NORTH', 'EAST'),
+                        help='Query specimens inside a bounding box')
+    parser.add_argument('--near', type=float, nargs=3, metavar=('LAT', 'LON', 'RADIUS_KM'),
+                        help='Query specimens within a radius')
+
+    args = parser.parse_args(argv)
+
+    if bool(args.input) == bool(args.index):
+        parser.error('exactly one of --input or --index is required')
+
+    if args.input:
+        if not args.input.exists():
+            print(f"Error: Input file not found: {args.input}", file=sys.stderr)
+            sys.exit(1)
+        if any(level < 1 or level > args.precision for level in args.levels):
+            parser.error(f'--levels must be between 1 and --precision ({args.precision})')
+
+        import zipfile
+        from archive_reader import ArchiveError
+
+        print(f"Reading {args.input}...")
+        try:
+            index = SpatialIndex.build(iter_coordinates(args.input, args.password), args.precision)
+        except ArchiveError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        except zipfile.BadZipFile as e:
+            print(f"Error: {args.input}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"  Located specimens: {len(index)}")
+
+        if args.output:
+            index.save(args.output, args.levels)
+            print(f"✓ Created {args.output}")
+            for level in args.levels:
+                print(f"  Level {level}: {len(index.clusters(level))} clusters")
+    else:
+        index = SpatialIndex.load(args.index)
+
+    if args.bbox:
+        points = index.query_bbox(*args.bbox)
+        print(f"Specimens in bounding box: {len(points)}")
+        print_points(points)
+
+    if args.near:
+        hits = index.query_radius(*args.near)
+        print(f"Specimens within {args.near[2]} km: {len(hits)}")
+        print_points((p for _, p in hits), {p[3]: d for d, p in hits})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+MineraLog Archive Merger
+Combines several ZIP exports into one, storing identical media once.
+
+Minerals are upserted by id: the entry with the latest ``updatedAt`` wins, and
+on equal timestamps the archive given last wins. The reference libraries of
+the inputs (reference_minerals.csv) are upserted the same way.
+
+Media files are addressed by their SHA-256 and keep the folder of their input,
+e.g. ``photos/<sha256><ext>``; photo ``fileName`` values are rewritten to
+match, bare names staying bare. A file that photos refer to is kept only if a
+surviving photo uses it. Loose ``media/`` files, which no photo refers to
+(csv_to_zip.py --media-dir exports), are always kept; loose ``photos/`` files
+are dropped. Dropped files are listed in a warning. A fresh manifest and
+checksums are written.
+
+Each kept media file is hashed from its own bytes, streamed, before the
+archive is written (checksums.sha256 precedes the media in the archive). The
+inputs' checksums.sha256 only serve as hints: a duplicate whose listed hash
+names a kept file with the same size and CRC-32 is taken as a copy of it
+without being read.
+
+Usage:
+    python merge_archives.py phone.zip tablet.zip -o merged.zip
+    python merge_archives.py a.zip b.zip -o merged.zip --password secret --encrypt
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import sys
+import zipfile
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from archive_reader import ArchiveError, iter_minerals, read_manifest
+from csv_to_zip import COPY_CHUNK_SIZE, MediaEntry, build_manifest, write_archive
+from mineral_records import ReferenceMineral
+from reference_csv import REFERENCE_CSV_NAME, encode_reference_csv, iter_csv_minerals, reference_id
+
+MEDIA_PREFIXES = ('media/', 'photos/')
+_EPOCH = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def parse_timestamp(value: Optional[str]) -> datetime:
+    """Parse an ISO-8601 timestamp for ordering; missing or malformed values sort first."""
+    if not value:
+        return _EPOCH
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return _EPOCH
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def updated_at(mineral: Dict[str, Any]) -> datetime:
+    """Parse a mineral's ``updatedAt`` for ordering."""
+    return parse_timestamp(mineral.get('updatedAt'))
+
+
+def read_checksums(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """Return the path -> SHA-256 mapping of an archive's checksums.sha256, if any."""
+    try:
+        content = zf.read('checksums.sha256').decode('utf-8')
+    except KeyError:
+        return {}
+    checksums = {}
+    for line in content.splitlines():
+        path, sep, sha256 = line.rpartition(';')
+        if sep and path:
+            checksums[path] = sha256.strip().lower()
+    return checksums
+
+
+def member_sha256(zf: zipfile.ZipFile, name: str) -> str:
+    """SHA-256 of an archive member, streamed."""
+    digest = hashlib.sha256()
+    with zf.open(name) as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_path(sha256: str, name: str) -> str:
+    """Content-addressed archive path for a media member, in the member's own folder."""
+    prefix = next((prefix for prefix in MEDIA_PREFIXES if name.startswith(prefix)), MEDIA_PREFIXES[0])
+    return f"{prefix}{sha256}{PurePosixPath(name).suffix.lower()}"
+
+
+def resolve_media(file_name: str, members: Dict[str, zipfile.ZipInfo]) -> Optional[str]:
+    """Map a photo ``fileName``, full path or bare name, to the member it refers to."""
+    for candidate in (file_name, *(prefix + file_name for prefix in MEDIA_PREFIXES)):
+        if candidate in members:
+            return candidate
+    return None
+
+
+def read_reference(zf: zipfile.ZipFile) -> List[ReferenceMineral]:
+    """Reference minerals of an archive's reference_minerals.csv, if any."""
+    try:
+        content = zf.read(REFERENCE_CSV_NAME).decode('utf-8')
+    except KeyError:
+        return []
+    return list(iter_csv_minerals(io.StringIO(content, newline='')))
+
+
+class MergeResult:
+    """Counters reported after a merge."""
+
+    __slots__ = ('minerals_in', 'minerals_out', 'media_in', 'media_out', 'bytes_in', 'bytes_out',
+                 'reference_in', 'reference_out', 'dropped')
+
+    def __init__(self):
+        self.minerals_in = 0
+        self.minerals_out = 0
+        self.media_in = 0
+        self.media_out = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.reference_in = 0
+        self.reference_out = 0
+        # (input archive, member) of media files left out: used only by superseded
+        # minerals, or loose under photos/
+        self.dropped: List[Tuple[Path, str]] = []
+
+
+def merge_archives(archives: Sequence[Path], output_path: Path, password: Optional[str] = None,
+                   output_password: Optional[str] = None) -> MergeResult:
+    """Merge ``archives`` (in priority order, last wins ties) into ``output_path``."""
+    result = MergeResult()
+    survivors: Dict[str, Tuple[Dict[str, Any], int]] = {}
+    reference: Dict[str, ReferenceMineral] = {}
+    has_reference = False
+    handles: List[zipfile.ZipFile] = []
+    # Per input archive: media member name -> ZipInfo, and listed (unverified) hashes
+    members: List[Dict[str, zipfile.ZipInfo]] = []
+    hints: List[Dict[str, str]] = []
+    # Per input archive: members some photo refers to, superseded minerals included
+    referenced: List[Set[str]] = []
+
+    try:
+        for index, archive_path in enumerate(archives):
+            try:
+                zf = zipfile.ZipFile(archive_path)
+            except zipfile.BadZipFile as e:
+                raise ArchiveError(f"{archive_path}: {e}")
+            handles.append(zf)
+            read_manifest(zf)
+            hints.append(read_checksums(zf))
+
+            media = {}
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.startswith(MEDIA_PREFIXES):
+                    continue
+                result.media_in += 1
+                result.bytes_in += info.file_size
+                media[info.filename] = info
+            members.append(media)
+            referenced.append(set())
+
+            for record in read_reference(zf):
+                has_reference = True
+                result.reference_in += 1
+                key = reference_id(record)
+                current = reference.get(key)
+                if current is None or parse_timestamp(record.updatedAt) >= parse_timestamp(current.updatedAt):
+                    reference[key] = record
+
+            for mineral in iter_minerals(archive_path, password):
+                result.minerals_in += 1
+                for photo in mineral.get('photos') or ():
+                    name = resolve_media(photo.get('fileName') or '', media)
+                    if name is not None:
+                        referenced[index].add(name)
+                current = survivors.get(mineral['id'])
+                if current is None or updated_at(mineral) >= updated_at(current[0]):
+                    survivors[mineral['id']] = (mineral, index)
+
+        # Merged path -> (SHA-256, input index, member) of the copy written, in first-use order
+        unique_media: Dict[str, Tuple[str, int, zipfile.ZipInfo]] = {}
+        merged_paths: Dict[Tuple[int, str], str] = {}
+
+        def merged_path(index: int, name: str) -> str:
+            key = (index, name)
+            if key in merged_paths:
+                return merged_paths[key]
+            info = members[index][name]
+            listed_sha256 = hints[index].get(name)
+            listed = unique_media.get(content_path(listed_sha256, name)) if listed_sha256 else None
+            if listed is not None and (listed[2].file_size, listed[2].CRC) == (info.file_size, info.CRC):
+                path = content_path(listed_sha256, name)
+            else:
+                sha256 = member_sha256(handles[index], name)
+                path = content_path(sha256, name)
+                if path not in unique_media:
+                    unique_media[path] = (sha256, index, info)
+                    result.bytes_out += info.file_size
+            merged_paths[key] = path
+            return path
+
+        minerals = []
+        photo_count = 0
+        for mineral, index in survivors.values():
+            for photo in mineral.get('photos') or ():
+                file_name = photo.get('fileName') or ''
+                name = resolve_media(file_name, members[index])
+                if name is not None:
+                    path = merged_path(index, name)
+                    # Keep bare names bare: the app resolves them under photos/
+                    photo['fileName'] = path if name == file_name else path.split('/', 1)[1]
+                photo_count += 1
+            minerals.append(mineral)
+
+        for index, media in enumerate(members):
+            for name in media:
+                if name.startswith('media/') and name not in referenced[index]:
+                    merged_path(index, name)
+                elif (index, name) not in merged_paths:
+                    result.dropped.append((archives[index], name))
+
+        minerals_json = json.dumps(minerals, indent=2, ensure_ascii=False).encode('utf-8')
+        manifest, payload = build_manifest(minerals_json, len(minerals), photo_count, output_password)
+
+        media: List[MediaEntry] = []
+        if has_reference:
+            reference_bytes = encode_reference_csv(reference.values())
+            media.append((REFERENCE_CSV_NAME, hashlib.sha256(reference_bytes).hexdigest(),
+                          partial(io.BytesIO, reference_bytes)))
+        media.extend(
+            (path, sha256, partial(handles[index].open, info))
+            for path, (sha256, index, info) in unique_media.items()
+        )
+        write_archive(output_path, manifest, payload, media)
+    finally:
+        for zf in handles:
+            zf.close()
+
+    result.minerals_out = len(survivors)
+    result.media_out = len(unique_media)
+    result.reference_out = len(reference)
+    return result
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Merge MineraLog ZIP exports with media deduplication')
+    parser.add_argument('archives', nargs='+', type=Path, help='ZIP exports to merge, oldest priority first')
+    parser.add_argument('-o', '--output', required=True, type=Path, help='Output ZIP file')
+    parser.add_argument('--password', type=str, help='Password of encrypted inputs')
+    parser.add_argument('--encrypt', action='store_true', help='Encrypt the merged export')
+
+    args = parser.parse_args(argv)
+
+    missing = [str(p) for p in args.archives if not p.exists()]
+    if missing:
+        print(f"Error: Archive(s) not found: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+    if args.output.resolve() in {p.resolve() for p in args.archives}:
+        print("Error: Output must not be one of the inputs", file=sys.stderr)
+        sys.exit(1)
+
+    if args.encrypt and not args.password:
+        import getpass
+        args.password = getpass.getpass("Enter encryption password: ")
+
+    print(f"Merging {len(args.archives)} archive(s)...")
+    try:
+        result = merge_archives(args.archives, args.output, args.password,
+                                args.password if args.encrypt else None)
+    except (ArchiveError, zipfile.BadZipFile) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✓ Created {args.output}")
+    print(f"  Minerals: {result.minerals_out} (from {result.minerals_in})")
+    print(f"  Media files: {result.media_out} (from {result.media_in})")
+    print(f"  Media bytes: {result.bytes_out} (from {result.bytes_in})")
+    if result.dropped:
+        print(f"Warning: {len(result.dropped)} media file(s) used only by superseded minerals "
+              "or by no photo were left out:", file=sys.stderr)
+        for archive_path, name in result.dropped:
+            print(f"  {archive_path}: {name}", file=sys.stderr)
+    if result.reference_in:
+        print(f"  Reference minerals: {result.reference_out} (from {result.reference_in})")
+    print("Done!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+MineraLog record model shared by the Python tools.
+
+Compact, slotted record classes for the entities of the import/export spec
+(DOCS/specs/import_export_spec.md): mineral, provenance, storage, photo and
+reference mineral. Slot names mirror the JSON keys of the spec so that
+serialisation is a straight attribute walk, without a key-mapping table.
+
+Provenance and storage sub-records are only created when a source row has data
+for them, and their UUIDs are only generated when the record is serialised.
+"""
+
+import json
+import uuid
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+class Record:
+    """Base class for slotted records; subclasses declare ``__slots__`` in JSON key order."""
+
+    __slots__ = ()
+    _values: Any = None
+
+    def __init_subclass__(cls, **kwargs: Any):
+        super().__init_subclass__(**kwargs)
+        # attrgetter fetches every slot in one C call, which keeps to_dict() cheap
+        cls._values = attrgetter(*cls.__slots__)
+
+    def __init__(self, **values: Any):
+        for name in self.__slots__:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"Unknown {type(self).__name__} field(s): {', '.join(sorted(values))}")
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Record':
+        """Build a record from a spec-shaped dictionary, ignoring unknown keys."""
+        record = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(record, name, data.get(name))
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the spec-shaped dictionary for this record."""
+        return dict(zip(self.__slots__, self._values(self)))
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r})"
+
+
+class Provenance(Record):
+    """Where and how a specimen was acquired."""
+
+    __slots__ = ('id', 'mineralId', 'site', 'locality', 'country', 'latitude', 'longitude',
+                 'acquiredAt', 'source', 'price', 'estimatedValue')
+
+    id: Optional[str]
+    mineralId: Optional[str]
+    site: Optional[str]
+    locality: Optional[str]
+    country: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    acquiredAt: Optional[str]
+    source: Optional[str]
+    price: Optional[float]
+    estimatedValue: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.id is None:
+            self.id = str(uuid.uuid4())
+        return super().to_dict()
+
+
+class Storage(Record):
+    """Physical storage location of a specimen."""
+
+    __slots__ = ('id', 'mineralId', 'place', 'container', 'box', 'slot', 'nfcTagId', 'qrContent')
+
+    id: Optional[str]
+    mineralId: Optional[str]
+    place: Optional[str]
+    container: Optional[str]
+    box: Optional[str]
+    slot: Optional[str]
+    nfcTagId: Optional[str]
+    qrContent: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.id is None:
+            self.id = str(uuid.uuid4())
+        if self.qrContent is None and self.mineralId:
+            self.qrContent = f"mineralapp://mineral/{self.mineralId}"
+        return super().to_dict()
+
+
+class Photo(Record):
+    """Photo attached to a specimen; ``fileName`` is relative to the archive root."""
+
+    __slots__ = ('id', 'mineralId', 'type', 'caption', 'takenAt', 'fileName')
+
+    id: Optional[str]
+    mineralId: Optional[str]
+    type: Optional[str]
+    caption: Optional[str]
+    takenAt: Optional[str]
+    fileName: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.id is None:
+            self.id = str(uuid.uuid4())
+        return super().to_dict()
+
+
+class Mineral(Record):
+    """Specimen entry of ``minerals.json`` with its nested sub-records."""
+
+    __slots__ = ('id', 'name', 'group', 'formula', 'crystalSystem', 'mohsMin', 'mohsMax',
+                 'cleavage', 'fracture', 'luster', 'streak', 'diaphaneity', 'habit',
+                 'specificGravity', 'fluorescence', 'magnetic', 'radioactive', 'dimensionsMm',
+                 'weightGr', 'notes', 'tags', 'status', 'createdAt', 'updatedAt',
+                 'provenance', 'storage', 'photos')
+
+    id: str
+    name: str
+    group: Optional[str]
+    formula: Optional[str]
+    crystalSystem: Optional[str]
+    mohsMin: Optional[float]
+    mohsMax: Optional[float]
+    cleavage: Optional[str]
+    fracture: Optional[str]
+    luster: Optional[str]
+    streak: Optional[str]
+    diaphaneity: Optional[str]
+    habit: Optional[str]
+    specificGravity: Optional[float]
+    fluorescence: Optional[str]
+    magnetic: bool
+    radioactive: bool
+    dimensionsMm: Optional[str]
+    weightGr: Optional[float]
+    notes: Optional[str]
+    tags: Optional[List[str]]
+    status: str
+    createdAt: Optional[str]
+    updatedAt: Optional[str]
+    provenance: Optional[Provenance]
+    storage: Optional[Storage]
+    photos: Optional[List[Photo]]
+
+    def __init__(self, **values: Any):
+        super().__init__(**values)
+        if self.magnetic is None:
+            self.magnetic = False
+        if self.radioactive is None:
+            self.radioactive = False
+        if self.status is None:
+            self.status = 'incomplete'
+
+    def ensure_provenance(self) -> Provenance:
+        """Return the provenance sub-record, creating it on first use."""
+        if self.provenance is None:
+            self.provenance = Provenance(mineralId=self.id)
+        return self.provenance
+
+    def ensure_storage(self) -> Storage:
+        """Return the storage sub-record, creating it on first use."""
+        if self.storage is None:
+            self.storage = Storage(mineralId=self.id)
+        return self.storage
+
+    def add_photo(self, photo: Photo) -> None:
+        """Attach a photo, creating the photo list on first use."""
+        if self.photos is None:
+            self.photos = []
+        photo.mineralId = self.id
+        self.photos.append(photo)
+
+    @property
+    def photo_count(self) -> int:
+        return len(self.photos) if self.photos else 0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Mineral':
+        mineral = super().from_dict(data)
+        if mineral.provenance is not None:
+            mineral.provenance = Provenance.from_dict(mineral.provenance)
+        if mineral.storage is not None:
+            mineral.storage = Storage.from_dict(mineral.storage)
+        mineral.photos = [Photo.from_dict(p) for p in mineral.photos] if mineral.photos else None
+        if mineral.magnetic is None:
+            mineral.magnetic = False
+        if mineral.radioactive is None:
+            mineral.radioactive = False
+        return mineral
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data['tags'] = self.tags or []
+        data['provenance'] = self.provenance.to_dict() if self.provenance is not None else None
+        data['storage'] = self.storage.to_dict() if self.storage is not None else None
+        data['photos'] = [p.to_dict() for p in self.photos] if self.photos else []
+        return data
+
+
+class ReferenceMineral(Record):
+    """
+    Entry of the reference library (``ReferenceMineralEntity``).
+
+    Keys that are not columns of the entity (legacy v5 fields such as
+    ``transparency`` or ``gemstone``) are kept in ``extra`` so that a record
+    read from an asset file serialises back without losing data.
+    """
+
+    __slots__ = ('id', 'nameFr', 'nameEn', 'synonyms', 'mineralGroup', 'formula',
+                 'mohsMin', 'mohsMax', 'density', 'crystalSystem', 'cleavage', 'fracture',
+                 'habit', 'luster', 'streak', 'diaphaneity', 'fluorescence', 'magnetism',
+                 'radioactivity', 'careInstructions', 'sensitivity', 'hazards',
+                 'storageRecommendations', 'identificationTips', 'diagnosticProperties',
+                 'colors', 'varieties', 'confusionWith', 'geologicalEnvironment',
+                 'typicalLocations', 'associatedMinerals', 'uses', 'rarity',
+                 'collectingDifficulty', 'historicalInfo', 'etymology', 'imageUrl',
+                 'localIconName', 'notes', 'isUserDefined', 'source', 'createdAt',
+                 'updatedAt', 'extra')
+
+    id: str
+    nameFr: str
+    nameEn: str
+    isUserDefined: bool
+    extra: Optional[Dict[str, Any]]
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ReferenceMineral':
+        mineral = super().from_dict(data)
+        extra = {k: v for k, v in data.items() if k not in _REFERENCE_FIELDS}
+        mineral.extra = extra or None
+        if mineral.isUserDefined is None:
+            mineral.isUserDefined = False
+        return mineral
+
+    @classmethod
+    def from_asset(cls, data: Dict[str, Any], dataset_source: Optional[str] = None) -> 'ReferenceMineral':
+        """
+        Build a record the way ``ReferenceMineralDatasetLoader`` reads an asset entry.
+
+        Legacy keys take precedence over the entity columns whenever they are
+        present, even empty, as with the loader's ``?:``; ``toxicity`` is
+        appended to ``hazards`` and ``source`` falls back to the dataset's.
+        """
+        mineral = cls.from_dict(data)
+        for column, legacy in _REFERENCE_ALIASES:
+            if data.get(legacy) is not None:
+                setattr(mineral, column, data[legacy])
+        toxicity = data.get('toxicity')
+        hazards = [part for part in (mineral.hazards, None if toxicity is None else f"Toxicité: {toxicity}")
+                   if part is not None]
+        mineral.hazards = '. '.join(hazards) or None
+        if mineral.source is None:
+            mineral.source = dataset_source or 'Standard library'
+        if mineral.extra:
+            mineral.extra = {k: v for k, v in mineral.extra.items() if k not in _REFERENCE_LEGACY_KEYS} or None
+        return mineral
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = dict(zip(_REFERENCE_COLUMNS, self._values(self)))
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+_REFERENCE_COLUMNS: Tuple[str, ...] = ReferenceMineral.__slots__[:-1]
+_REFERENCE_FIELDS = frozenset(ReferenceMineral.__slots__)
+
+# (entity column, legacy asset key) pairs mapped by ReferenceMineralDatasetLoader
+_REFERENCE_ALIASES: Tuple[Tuple[str, str], ...] = (
+    ('diaphaneity', 'transparency'),
+    ('colors', 'color'),
+    ('varieties', 'varietiesAndForms'),
+    ('confusionWith', 'commonConfusions'),
+    ('geologicalEnvironment', 'formationEnvironment'),
+    ('historicalInfo', 'historicalNotes'),
+)
+_REFERENCE_LEGACY_KEYS = frozenset([legacy for _, legacy in _REFERENCE_ALIASES] + ['toxicity'])
+
+
+def dump_json_array(records: Iterable[Record], indent: int = 2) -> bytes:
+    """
+    Serialise records as a JSON array, one record at a time.
+
+    The output is byte-identical to ``json.dumps([r.to_dict() ...], indent=indent,
+    ensure_ascii=False)`` but only one record's dictionary is alive at a time.
+    """
+    pad = ' ' * indent
+    encoder = json.JSONEncoder(indent=indent, ensure_ascii=False)
+    chunks: List[str] = []
+    for record in records:
+        encoded = encoder.encode(record.to_dict())
+        chunks.append(pad + encoded.replace('\n', '\n' + pad))
+    if not chunks:
+        return b'[]'
+    return ('[\n' + ',\n'.join(chunks) + '\n]').encode('utf-8')
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+MineraLog command-line tools.
+
+Single entry point for the data tools. Each subcommand lives in its own module,
+which is only imported when that subcommand runs, so ``mineralog <command>``
+pays the import cost of that command alone.
+
+Usage:
+    mineralog convert -i minerals.csv -o export.zip
+    mineralog merge phone.zip tablet.zip -o merged.zip
+    mineralog stats exports/*.zip -o report.json
+    mineralog geo -i export.zip -o specimens.geo.json.gz
+    mineralog dedup -i reference_minerals_v5.json -o reference_minerals_v6.json
+    mineralog enrich -i reference_minerals_v5.json -o reference_minerals_v6.json
+    mineralog check-ids --old reference_minerals_v5.json --new reference_minerals_v6.json
+"""
+
+from __future__ import annotations
+
+import importlib
+import sys
+
+PROG = 'mineralog'
+VERSION = '3.2.0'
+
+# Subcommand -> (module, summary); modules must expose main(argv).
+# Nothing beyond the standard bootstrap is imported here, typing included.
+COMMANDS = {
+    'convert': ('csv_to_zip', 'Convert a minerals CSV file to a ZIP export'),
+    'merge': ('merge_archives', 'Merge ZIP exports with media deduplication'),
+    'stats': ('collection_stats', 'Aggregate statistics over many ZIP exports'),
+    'geo': ('geo_index', 'Build and query a geospatial index of specimens'),
+    'dedup': ('deduplicate_minerals', 'Deduplicate the reference minerals library'),
+    'enrich': ('enrich_database', 'Merge duplicates and enrich the reference library'),
+    'check-ids': ('reference_id_map', 'Check that old reference ids resolve in a new library'),
+}
+
+
+def usage() -> str:
+    width = max(len(name) for name in COMMANDS)
+    lines = [f"usage: {PROG} <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_, summary) in COMMANDS.items()]
+    lines += ["", f"Run '{PROG} <command> --help' for the options of a command."]
+    return '\n'.join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+    if argv[0] == '--version':
+        print(f"{PROG} {VERSION}")
+        return 0
+
+    command = argv[0]
+    if command not in COMMANDS:
+        print(f"{PROG}: unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(COMMANDS[command][0])
+    # argparse takes its program name from argv[0]
+    sys.argv[0] = f"{PROG} {command}"
+    module.main(argv[1:])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+MineraLog reference minerals CSV.
+
+Builds the ``reference_minerals.csv`` entry of a ZIP export from a reference
+library JSON (an asset file or a bare array) or CSV. The layout matches the
+app's ``ReferenceMineralCsvMapper``: the same 24 columns, values quoted by
+``escapeCsvValue``, and one ``\\n``-terminated line per mineral. JSON entries
+are read like ``ReferenceMineralDatasetLoader`` reads the bundled asset, legacy
+keys such as ``transparency`` included.
+
+The file is produced line by line, so it can be hashed in one pass and then
+streamed into the archive in a second one without being held in memory.
+
+``ZipBackupService.parseReferenceMineralsCsv`` splits the content on line
+breaks before parsing each line, so line breaks inside values are written as
+spaces. ``parse_csv_line`` is a port of the app's ``parseCsvLine``; it is
+used to report the rows the app would not read back as written (it misreads
+most values containing quotes).
+
+Usage:
+    python csv_to_zip.py -i minerals.csv -o export.zip --reference reference_minerals_v6.json
+"""
+
+import csv
+import hashlib
+import io
+import json
+import re
+import uuid
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from mineral_records import ReferenceMineral
+
+REFERENCE_CSV_NAME = 'reference_minerals.csv'
+
+# ReferenceMineralCsvMapper.HEADERS, in order
+REFERENCE_CSV_HEADERS = (
+    'id', 'nameFr', 'nameEn', 'synonyms', 'mineralGroup', 'formula',
+    'mohsMin', 'mohsMax', 'density', 'crystalSystem', 'cleavage', 'fracture', 'habit',
+    'luster', 'streak', 'diaphaneity', 'fluorescence', 'magnetism', 'radioactivity',
+    'notes', 'isUserDefined', 'source', 'createdAt', 'updatedAt',
+)
+_csv_values = attrgetter(*REFERENCE_CSV_HEADERS)
+_FLOAT_COLUMNS = frozenset(('mohsMin', 'mohsMax', 'density'))
+# Line breaks recognised by Kotlin's String.lines()
+_LINE_BREAK = re.compile(r'\r\n|\r|\n')
+
+# Namespace of the ids given to reference entries that have none. The CSV is
+# generated twice (hash, then write), so ids must not be random.
+_REFERENCE_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'mineralog:reference-mineral')
+
+
+def escape_csv_value(value: str) -> str:
+    """Port of ``ReferenceMineralCsvMapper.escapeCsvValue``."""
+    if ',' in value or '"' in value or '\n' in value:
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def unescape_csv_value(value: str) -> str:
+    """Port of ``ReferenceMineralCsvMapper.unescapeCsvValue``."""
+    if value.startswith('"') and value.endswith('"'):
+        return value[1:-1].replace('""', '"')
+    return value
+
+
+def parse_csv_line(line: str) -> List[str]:
+    """Port of ``ZipBackupService.parseCsvLine``, quirks included."""
+    result = []
+    current: List[str] = []
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            # An escaped quote is kept, but the second quote is not skipped
+            if in_quotes and i + 1 < len(line) and line[i + 1] == '"':
+                current.append('"')
+            else:
+                in_quotes = not in_quotes
+        elif char == ',' and not in_quotes:
+            result.append(''.join(current))
+            current = []
+        else:
+            current.append(char)
+    result.append(''.join(current))
+    return [unescape_csv_value(value) for value in result]
+
+
+def format_value(column: str, value: Any) -> str:
+    """Render a JSON or CSV value the way ``ReferenceMineralCsvMapper.toCsvRow`` does."""
+    if value is None or value == '':
+        return 'false' if column == 'isUserDefined' else ''
+    if column == 'isUserDefined':
+        if isinstance(value, str):
+            return 'true' if value.strip().lower() in ('true', '1', 'yes') else 'false'
+        return 'true' if value else 'false'
+    if column in _FLOAT_COLUMNS:
+        # Float.toString(): always a decimal point ("7.0")
+        try:
+            return repr(float(value))
+        except ValueError:
+            return ''
+    return _LINE_BREAK.sub(' ', str(value))
+
+
+def reference_id(mineral: ReferenceMineral) -> str:
+    """Id of a reference mineral; entries without one get a stable id derived from ``nameFr``."""
+    if mineral.id:
+        return str(mineral.id)
+    return str(uuid.uuid5(_REFERENCE_ID_NAMESPACE, format_value('nameFr', mineral.nameFr).strip().lower()))
+
+
+def reference_row(mineral: ReferenceMineral) -> List[str]:
+    """CSV cells of one reference mineral, in ``REFERENCE_CSV_HEADERS`` order."""
+    cells = [format_value(column, value)
+             for column, value in zip(REFERENCE_CSV_HEADERS, _csv_values(mineral))]
+    if not cells[0]:
+        cells[0] = reference_id(mineral)
+    return cells
+
+
+def iter_csv_minerals(lines: Iterable[str]) -> Iterator[ReferenceMineral]:
+    """Yield the minerals of reference CSV content, header line first."""
+    for row in csv.DictReader(lines):
+        yield ReferenceMineral.from_dict(row)
+
+
+def iter_reference_minerals(path: Path) -> Iterator[ReferenceMineral]:
+    """Yield the minerals of a reference JSON (asset object or array) or CSV file."""
+    if path.suffix.lower() == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            yield from iter_csv_minerals(f)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        entries, dataset_source = data.get('minerals', []), data.get('source')
+    else:
+        entries, dataset_source = data, None
+    for entry in entries:
+        yield ReferenceMineral.from_asset(entry, dataset_source)
+
+
+def iter_reference_lines(minerals: Iterable[ReferenceMineral]) -> Iterator[Tuple[List[str], bytes]]:
+    """Yield (cells, encoded line) for the header and each of ``minerals``."""
+    header = list(REFERENCE_CSV_HEADERS)
+    yield header, (','.join(header) + '\n').encode('utf-8')
+    for mineral in minerals:
+        cells = reference_row(mineral)
+        yield cells, (','.join(escape_csv_value(cell) for cell in cells) + '\n').encode('utf-8')
+
+
+def encode_reference_csv(minerals: Iterable[ReferenceMineral]) -> bytes:
+    """The whole ``reference_minerals.csv`` content of ``minerals``, for libraries already in memory."""
+    return b''.join(line for _, line in iter_reference_lines(minerals))
+
+
+class _LineStream(io.RawIOBase):
+    """Readable binary stream over the encoded lines of a reference CSV."""
+
+    def __init__(self, path: Path):
+        self._lines = (line for _, line in iter_reference_lines(iter_reference_minerals(path)))
+        self._pending = b''
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            line = next(self._lines, None)
+            if line is None:
+                return 0
+            self._pending = line
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class ReferenceCsv:
+    """Summary of a reference CSV pass: digest, row count and rows the app cannot read back."""
+
+    __slots__ = ('path', 'sha256', 'rows', 'unreadable')
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.sha256 = ''
+        self.rows = 0
+        # (mineral id, first column) of each row the app's parser reads differently
+        self.unreadable: List[Tuple[str, str]] = []
+
+    @classmethod
+    def scan(cls, path: Path) -> 'ReferenceCsv':
+        """Hash the CSV generated from ``path`` and check each line against the app's parser."""
+        result = cls(path)
+        digest = hashlib.sha256()
+        for cells, line in iter_reference_lines(iter_reference_minerals(path)):
+            digest.update(line)
+            parsed = parse_csv_line(line.decode('utf-8').rstrip('\n'))
+            if parsed != cells:
+                # Later columns of the row are shifted too; the first one is the culprit.
+                # Extra trailing cells differ only in length: blame the last column.
+                parsed += [''] * (len(cells) - len(parsed))
+                result.unreadable.append(next(
+                    ((cells[0], column) for column, cell, value
+                     in zip(REFERENCE_CSV_HEADERS, cells, parsed) if cell != value),
+                    (cells[0], REFERENCE_CSV_HEADERS[-1]),
+                ))
+            result.rows += 1
+        result.rows -= 1  # header
+        result.sha256 = digest.hexdigest()
+        return result
+
+    def open(self) -> io.BufferedReader:
+        """Stream the CSV bytes again, line by line."""
+        return io.BufferedReader(_LineStream(self.path))
+
+    def entry(self) -> Tuple[str, str, Callable[[], BinaryIO]]:
+        """Archive entry (path, SHA-256, opener) as taken by ``write_archive``."""
+        return REFERENCE_CSV_NAME, self.sha256, self.open
+
+
+def read_reference_csv(content: str, headers: Optional[List[str]] = None) -> List[Dict[str, str]]:
+    """Read ``reference_minerals.csv`` content the way ``parseReferenceMineralsCsv`` does."""
+    lines = [line for line in _LINE_BREAK.split(content) if line.strip()]
+    if not lines:
+        return []
+    headers = headers or parse_csv_line(lines[0])
+    return [dict(zip(headers, parse_csv_line(line))) for line in lines[1:]]
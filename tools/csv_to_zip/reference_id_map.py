@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+MineraLog Reference ID Map
+Old-id -> surviving-id tables for reference library migrations.
+
+When deduplicate_minerals.py or enrich_database.py collapse duplicate
+reference minerals, only one id of each group survives. They write the ids
+that were dropped, with the id that replaced them, next to the new asset:
+
+    reference_minerals_v6.json  ->  reference_minerals_v6.idmap.csv
+
+The table is a two-column CSV (``oldId,newId``) sorted by ``oldId``. Ids that
+survive unchanged are not listed: an id missing from the table maps to
+itself. The sorted order lets a table be applied in bulk, e.g. loaded into a
+temporary table and joined in one UPDATE, or merge-joined against sorted
+specimen rows.
+
+This tool checks that every id of the old asset resolves in the new one.
+
+Usage:
+    python reference_id_map.py --old reference_minerals_v5.json --new reference_minerals_v6.json
+    python reference_id_map.py --old v5.json --new v6.json --map v6.idmap.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+
+IDMAP_HEADER = ('oldId', 'newId')
+IDMAP_SUFFIX = '.idmap.csv'
+
+
+def id_map_path(asset_path: Path) -> Path:
+    """Path of the id map written alongside a reference asset."""
+    asset_path = Path(asset_path)
+    return asset_path.with_name(asset_path.stem + IDMAP_SUFFIX)
+
+
+def build_id_map(groups: Iterable[Iterable[Optional[str]]], survivors: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Map the ids of collapsed entries to their group's surviving id.
+
+    ``groups`` yields the ids of each collapsed group and ``survivors`` the
+    id kept for that group, in the same order. Ids that survive elsewhere in
+    the asset are never remapped.
+    """
+    groups = [list(ids) for ids in groups]
+    survivors = list(survivors)
+    kept = {survivor for survivor in survivors if survivor}
+    id_map: Dict[str, str] = {}
+    for ids, survivor in zip(groups, survivors):
+        if not survivor:
+            continue
+        for old_id in ids:
+            if old_id and old_id not in kept:
+                id_map.setdefault(old_id, survivor)
+    return id_map
+
+
+def write_id_map(path: Path, id_map: Mapping[str, str]) -> None:
+    """Write ``id_map`` as a CSV table sorted by old id."""
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(IDMAP_HEADER)
+        writer.writerows(sorted(id_map.items()))
+
+
+def read_id_map(path: Path) -> Dict[str, str]:
+    """Read a table written by :func:`write_id_map`."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if tuple(header or ()) != IDMAP_HEADER:
+            raise ValueError(f"{path}: expected header {','.join(IDMAP_HEADER)}")
+        return {row[0]: row[1] for row in reader if row}
+
+
+def asset_ids(asset_path: Path) -> List[str]:
+    """Ids of the minerals of a reference asset, in file order."""
+    with open(asset_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [mineral.get('id') for mineral in data.get('minerals', [])]
+
+
+def check_id_map(old_ids: Iterable[Optional[str]], new_ids: Iterable[Optional[str]],
+                 id_map: Mapping[str, str]) -> List[str]:
+    """Return one message per old id that does not resolve in the new asset."""
+    new_set: Set[str] = {new_id for new_id in new_ids if new_id}
+    problems = []
+    for old_id in sorted({old_id for old_id in old_ids if old_id}):
+        if old_id in new_set:
+            if old_id in id_map:
+                problems.append(f"{old_id}: still present but remapped to {id_map[old_id]}")
+        elif old_id not in id_map:
+            problems.append(f"{old_id}: missing from the new asset and the id map")
+        elif id_map[old_id] not in new_set:
+            problems.append(f"{old_id}: remapped to {id_map[old_id]}, which is not in the new asset")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Check that every id of an old reference asset resolves in a new one')
+    parser.add_argument('--old', required=True, type=Path, help='Old reference JSON')
+    parser.add_argument('--new', required=True, type=Path, help='New reference JSON')
+    parser.add_argument('--map', type=Path, help=f"Id map (default: the new asset's {IDMAP_SUFFIX})")
+
+    args = parser.parse_args(argv)
+    map_path = args.map or id_map_path(args.new)
+
+    for path in (args.old, args.new, map_path):
+        if not path.exists():
+            print(f"Error: File not found: {path}", file=sys.stderr)
+            sys.exit(1)
+
+    try:
+        id_map = read_id_map(map_path)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    old_ids = asset_ids(args.old)
+    problems = check_id_map(old_ids, asset_ids(args.new), id_map)
+    if problems:
+        for problem in problems:
+            print(f"  ✗ {problem}", file=sys.stderr)
+        print(f"Error: {len(problems)} id(s) of {args.old} do not resolve in {args.new}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"✓ All {len(set(filter(None, old_ids)))} ids of {args.old} resolve in {args.new}")
+    print(f"  Remapped: {len(id_map)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Tests of collection_stats.py caching and error reporting (run with pytest)."""
+
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import collection_stats
+from collection_stats import aggregate, archive_key
+
+
+def write_export(path: Path, minerals, manifest=None) -> Path:
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('manifest.json', json.dumps(manifest or {'app': 'MineraLog', 'encrypted': False}))
+        zf.writestr('minerals.json', json.dumps(minerals))
+    return path
+
+
+def test_cache_key_ignores_file_identity(tmp_path):
+    minerals = [{'id': 'm1', 'group': 'Silicates'}]
+    first = write_export(tmp_path / 'a.zip', minerals)
+    copy = tmp_path / 'copy.zip'
+    copy.write_bytes(first.read_bytes())
+    other = write_export(tmp_path / 'b.zip', minerals + [{'id': 'm2'}])
+
+    assert archive_key(first) == archive_key(copy)
+    assert archive_key(first) != archive_key(other)
+
+
+def test_cache_hit_does_not_read_records(tmp_path, monkeypatch):
+    archive = write_export(tmp_path / 'a.zip', [{'id': 'm1', 'group': 'Silicates'}])
+    cache_dir = tmp_path / 'cache'
+    aggregate([archive], cache_dir=cache_dir, workers=1)
+
+    def fail(*args):
+        raise AssertionError('archive read on a cache hit')
+
+    monkeypatch.setattr(collection_stats, 'archive_stats', fail)
+    totals, cache_hits, errors = aggregate([archive], cache_dir=cache_dir, workers=1)
+    assert (totals.minerals, cache_hits, errors) == (1, 1, [])
+
+
+def test_unreadable_archives_are_skipped(tmp_path, capsys):
+    good = write_export(tmp_path / 'good.zip', [{'id': 'm1'}])
+    corrupt = tmp_path / 'corrupt.zip'
+    corrupt.write_bytes(b'not a zip')
+    argon = write_export(tmp_path / 'argon.zip', [], {'encrypted': True, 'kdf': 'Argon2id'})
+    truncated = tmp_path / 'truncated.zip'
+    with zipfile.ZipFile(truncated, 'w') as zf:
+        zf.writestr('manifest.json', json.dumps({'encrypted': False}))
+        zf.writestr('minerals.json', '[{"id": "x"')
+    bad_manifest = tmp_path / 'bad_manifest.zip'
+    with zipfile.ZipFile(bad_manifest, 'w') as zf:
+        zf.writestr('manifest.json', '{"encrypted": ')
+        zf.writestr('minerals.json', '[]')
+    report = tmp_path / 'report.json'
+
+    unreadable = [corrupt, argon, truncated, bad_manifest]
+    with pytest.raises(SystemExit) as exit_info:
+        collection_stats.main([str(good), *map(str, unreadable), '-o', str(report), '-j', '2'])
+
+    assert exit_info.value.code == 1
+    stderr = capsys.readouterr().err
+    for archive in unreadable:
+        assert f"Error: {archive}: " in stderr
+    assert f"Error: {argon}: unsupported key derivation 'Argon2id'" in stderr
+    assert json.loads(report.read_text(encoding='utf-8'))['minerals'] == 1
@@ -0,0 +1,95 @@
+"""Interrupt/resume tests of csv_to_zip.py conversions (run with pytest)."""
+
+import json
+import shutil
+import zipfile
+from pathlib import Path
+
+import pytest
+
+import csv_to_zip
+from conversion_journal import ConversionJournal, JournalError, plan_for
+
+
+def make_job(tmp_path: Path):
+    input_path = tmp_path / 'minerals.csv'
+    input_path.write_text('name,group,notes\nQuartz,Silicates,"Vitreux, gras"\nCalcite,Carbonates,\n',
+                          encoding='utf-8')
+    media_dir = tmp_path / 'media'
+    media_dir.mkdir()
+    for index in range(4):
+        (media_dir / f"photo{index}.jpg").write_bytes(bytes([index]) * 50000)
+    return input_path, tmp_path / 'export.zip', media_dir
+
+
+def interrupt_after(monkeypatch, copies: int) -> None:
+    """Make the conversion stop like a killed process after ``copies`` media files."""
+    copy = shutil.copyfileobj
+    calls = []
+
+    def copyfileobj(src, dst, length=0):
+        if len(calls) == copies:
+            raise KeyboardInterrupt
+        calls.append(src)
+        copy(src, dst, length)
+
+    monkeypatch.setattr(csv_to_zip.shutil, 'copyfileobj', copyfileobj)
+
+
+def test_resumed_archive_matches_an_uninterrupted_run(tmp_path, monkeypatch):
+    input_path, output_path, media_dir = make_job(tmp_path)
+    journal_dir = output_path.with_name(output_path.name + '.journal')
+
+    with monkeypatch.context() as patch:
+        interrupt_after(patch, 2)
+        with pytest.raises(KeyboardInterrupt):
+            csv_to_zip.convert(input_path, output_path, media_dir=media_dir)
+    log = (journal_dir / 'journal.jsonl').read_text(encoding='utf-8').splitlines()
+    assert sum('"event":"entry"' in line for line in log) == 5  # 3 fixed entries + 2 media
+
+    # Same journal with no finished entries: writes the whole archive in one go
+    uninterrupted_dir = tmp_path / 'uninterrupted'
+    shutil.copytree(journal_dir, uninterrupted_dir)
+    (uninterrupted_dir / 'journal.jsonl').write_text(
+        ''.join(line + '\n' for line in log if '"event":"entry"' not in line), encoding='utf-8')
+
+    csv_to_zip.convert(input_path, output_path, media_dir=media_dir, resume=True)
+    resumed = output_path.read_bytes()
+    assert not journal_dir.exists()
+
+    shutil.move(str(uninterrupted_dir), str(journal_dir))
+    output_path.unlink()
+    csv_to_zip.convert(input_path, output_path, media_dir=media_dir, resume=True)
+    assert output_path.read_bytes() == resumed
+
+    with zipfile.ZipFile(output_path) as zf:
+        assert zf.testzip() is None
+        assert [m['name'] for m in json.loads(zf.read('minerals.json'))] == ['Quartz', 'Calcite']
+        assert zf.read('media/photo3.jpg') == bytes([3]) * 50000
+
+
+def test_resume_refuses_another_password(tmp_path):
+    input_path, output_path, media_dir = make_job(tmp_path)
+    plan = plan_for(input_path, output_path, media_dir, True)
+
+    journal = ConversionJournal.for_output(output_path)
+    journal.start(plan, password='first')
+    journal.close()
+    assert 'first' not in journal.log_path.read_text(encoding='utf-8')
+
+    with pytest.raises(JournalError, match='password differs'):
+        ConversionJournal.for_output(output_path).start(plan, resume=True, password='second')
+
+    resumed = ConversionJournal.for_output(output_path)
+    resumed.start(plan, resume=True, password='first')
+    resumed.finish()
+
+
+def test_missing_cryptography_leaves_no_journal(tmp_path, monkeypatch):
+    input_path, output_path, media_dir = make_job(tmp_path)
+    monkeypatch.setattr(csv_to_zip, 'crypto_available', lambda: False)
+
+    with pytest.raises(SystemExit):
+        csv_to_zip.main(['-i', str(input_path), '-o', str(output_path), '--password', 'secret'])
+
+    assert set(tmp_path.iterdir()) == {input_path, media_dir}
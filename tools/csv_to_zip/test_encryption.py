@@ -0,0 +1,59 @@
+"""Encrypt -> read round trips of the encrypted export paths (run with pytest; needs the crypto extra)."""
+
+import json
+import zipfile
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+import csv_to_zip
+from archive_reader import ArchiveError, iter_minerals, read_manifest, read_minerals_json
+from csv_to_zip import decrypt_content, encrypt_content
+from merge_archives import merge_archives
+
+
+def convert(tmp_path: Path, name: str, rows: str, password: str) -> Path:
+    csv_path = tmp_path / f"{name}.csv"
+    csv_path.write_text('name,group,notes\n' + rows, encoding='utf-8')
+    output = tmp_path / f"{name}.zip"
+    csv_to_zip.main(['-i', str(csv_path), '-o', str(output), '--password', password])
+    return output
+
+
+def test_encrypt_content_round_trip():
+    content = 'Quartz, « œil-de-chat »'.encode('utf-8')
+    ciphertext, salt_hex, iv_hex = encrypt_content(content, 'secret')
+    assert content not in ciphertext
+    assert decrypt_content(ciphertext, 'secret', salt_hex, iv_hex) == content
+
+
+def test_converted_archive_reads_back(tmp_path):
+    archive = convert(tmp_path, 'export', 'Quartz,Silicates,"Vitreux, gras"\nCalcite,Carbonates,\n', 'secret')
+
+    with zipfile.ZipFile(archive) as zf:
+        manifest = read_manifest(zf)
+        assert manifest['encrypted'] and manifest['kdf'] == 'PBKDF2-SHA256'
+        assert b'Quartz' not in zf.read('minerals.json')
+        plain = json.loads(read_minerals_json(zf, manifest, 'secret'))
+    assert [m['name'] for m in plain] == ['Quartz', 'Calcite']
+    assert [m['notes'] for m in iter_minerals(archive, 'secret')] == ['Vitreux, gras', None]
+
+    with pytest.raises(ArchiveError, match='wrong password'):
+        list(iter_minerals(archive, 'not the password'))
+    with pytest.raises(ArchiveError, match='password is required'):
+        list(iter_minerals(archive))
+
+
+def test_merge_encrypted_inputs_to_encrypted_output(tmp_path):
+    first = convert(tmp_path, 'first', 'Quartz,Silicates,\n', 'secret')
+    second = convert(tmp_path, 'second', 'Galène,Sulfures,\n', 'secret')
+    output = tmp_path / 'merged.zip'
+
+    result = merge_archives([first, second], output, 'secret', 'other secret')
+
+    assert result.minerals_out == 2
+    assert sorted(m['name'] for m in iter_minerals(output, 'other secret')) == ['Galène', 'Quartz']
+    with pytest.raises(ArchiveError):
+        list(iter_minerals(output, 'secret'))
@@ -0,0 +1,130 @@
+"""Tests of geo_index.py queries against brute-force scans (run with pytest)."""
+
+import gzip
+import random
+from collections import Counter
+
+import pytest
+
+from geo_index import MAX_QUERY_CELLS, SpatialIndex, encode_geohash, haversine_km
+
+# Points on and next to the antimeridian and the poles, where cells wrap or degenerate
+EDGE_COORDINATES = [
+    (90.0, 0.0), (-90.0, 0.0), (89.999, 179.999), (-89.999, -179.999), (89.5, -45.0), (-89.5, 135.0),
+    (0.0, 180.0), (0.0, -180.0), (12.5, 179.9999), (-12.5, -179.9999), (65.0, 180.0), (-65.0, -180.0),
+]
+
+
+def make_index(seed: int = 20251116, count: int = 3000) -> SpatialIndex:
+    rng = random.Random(seed)
+    coordinates = [(round(rng.uniform(-90, 90), 6), round(rng.uniform(-180, 180), 6)) for _ in range(count)]
+    # Dense clusters near the antimeridian and both poles
+    coordinates += [(round(rng.uniform(-90, -85), 6), round(rng.uniform(-180, 180), 6)) for _ in range(200)]
+    coordinates += [(round(rng.uniform(85, 90), 6), round(rng.uniform(-180, 180), 6)) for _ in range(200)]
+    coordinates += [(round(rng.uniform(-60, 60), 6), round(rng.choice((-1, 1)) * rng.uniform(179, 180), 6))
+                    for _ in range(200)]
+    coordinates += EDGE_COORDINATES
+    return SpatialIndex.build((f"m{i}", f"Mineral {i}", lat, lon) for i, (lat, lon) in enumerate(coordinates))
+
+
+@pytest.fixture(scope='module')
+def index() -> SpatialIndex:
+    return make_index()
+
+
+def ids(points) -> list:
+    return sorted(p[3] for p in points)
+
+
+def brute_bbox(index, south, west, north, east):
+    def in_lon(lon):
+        return west <= lon <= east if west <= east else lon >= west or lon <= east
+    return [p for p in index.points if south <= p[1] <= north and in_lon(p[2])]
+
+
+def test_bbox_matches_brute_force(index):
+    rng = random.Random(1)
+    boxes = [
+        (-10, 170, 10, -170),   # crosses the antimeridian
+        (80, 179, 90, -179),    # antimeridian at the north pole
+        (-90, -180, -85, 180),  # whole southern cap
+        (-90, -180, 90, 180),   # whole world
+        (0, 179.9999, 15, 180),
+        (-15, -180, 0, -179.9999),
+    ]
+    for _ in range(300):
+        south, north = sorted(rng.uniform(-95, 95) for _ in range(2))
+        boxes.append((south, rng.uniform(-180, 180), north, rng.uniform(-180, 180)))
+
+    for south, west, north, east in boxes:
+        expected = brute_bbox(index, max(south, -90), west, min(north, 90), east)
+        assert ids(index.query_bbox(south, west, north, east)) == ids(expected), (south, west, north, east)
+
+
+def test_radius_matches_brute_force(index):
+    rng = random.Random(2)
+    queries = [
+        (90.0, 0.0, 300), (-90.0, 0.0, 300),          # centred on a pole
+        (88.0, 100.0, 500), (-87.0, -30.0, 400),       # cap reaching over a pole
+        (0.0, 180.0, 200), (30.0, -179.9, 150),        # across the antimeridian
+        (70.0, 179.5, 1500),                           # wide cap at high latitude, across the antimeridian
+        (10.0, 20.0, 12000), (-45.0, 60.0, 20015),     # beyond a quarter of the globe
+    ]
+    for _ in range(200):
+        queries.append((rng.uniform(-90, 90), rng.uniform(-180, 180), rng.choice((10, 100, 800, 3000))))
+
+    for lat, lon, radius in queries:
+        hits = index.query_radius(lat, lon, radius)
+        expected = [p for p in index.points if haversine_km(lat, lon, p[1], p[2]) <= radius]
+        assert ids(p for _, p in hits) == ids(expected), (lat, lon, radius)
+        distances = [d for d, _ in hits]
+        assert distances == sorted(distances)
+
+
+def test_cover_is_capped(index):
+    rng = random.Random(3)
+    for _ in range(300):
+        south, north = sorted(rng.uniform(-90, 90) for _ in range(2))
+        west, east = sorted(rng.uniform(-180, 180) for _ in range(2))
+        cells = index._cover(south, west, north, east)
+        assert 0 < len(cells) <= MAX_QUERY_CELLS
+        assert len(set(cells)) == len(cells)
+    assert len(index._cover(-90, -180, 90, 180)) <= MAX_QUERY_CELLS
+
+
+def test_clusters_group_by_prefix(index):
+    for level in (1, 3, 6):
+        clusters = index.clusters(level)
+        expected = Counter(p[0][:level] for p in index.points)
+        assert {gh: n for gh, n, _, _ in clusters} == dict(expected)
+        assert [gh for gh, _, _, _ in clusters] == sorted(expected)
+        sums = {}
+        for p in index.points:
+            lat_sum, lon_sum = sums.get(p[0][:level], (0.0, 0.0))
+            sums[p[0][:level]] = (lat_sum + p[1], lon_sum + p[2])
+        for gh, n, lat, lon in clusters:
+            assert (lat, lon) == pytest.approx((sums[gh][0] / n, sums[gh][1] / n))
+
+
+def test_save_load_round_trip(index, tmp_path):
+    path = tmp_path / 'specimens.geo.json.gz'
+    index.save(path, levels=(1, 2))
+    loaded = SpatialIndex.load(path)
+
+    assert loaded.precision == index.precision
+    assert loaded.points == index.points
+    assert loaded.clusters(2) == index.clusters(2)
+    assert ids(loaded.query_bbox(-10, 170, 10, -170)) == ids(index.query_bbox(-10, 170, 10, -170))
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.json.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write('{"format": "something-else"}')
+    with pytest.raises(ValueError):
+        SpatialIndex.load(path)
+
+
+def test_edge_points_keep_their_cells():
+    assert encode_geohash(90.0, 180.0, 4) == 'zzzz'
+    assert encode_geohash(-90.0, -180.0, 4) == '0000'
@@ -0,0 +1,156 @@
+"""Tests of merge_archives.py on hand-built app-style exports (run with pytest)."""
+
+import hashlib
+import json
+import zipfile
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+import csv_to_zip
+from merge_archives import merge_archives, read_checksums
+from reference_csv import REFERENCE_CSV_NAME, read_reference_csv
+
+REFERENCE_HEADER = 'id,nameFr,nameEn,updatedAt\n'
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_export(path: Path, minerals: List[Dict], files: Dict[str, bytes], checksums: Dict[str, str] = None) -> Path:
+    """Write an export laid out like the app's: photos/<fileName>, bare names in minerals.json."""
+    minerals_json = json.dumps(minerals).encode('utf-8')
+    listed = {'minerals.json': sha256(minerals_json)}
+    listed.update((name, sha256(content)) for name, content in files.items() if name.startswith('photos/'))
+    listed.update(checksums or {})
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('manifest.json', json.dumps({'app': 'MineraLog', 'encrypted': False}))
+        zf.writestr('checksums.sha256', ''.join(f"{name};{digest}\n" for name, digest in listed.items()))
+        zf.writestr('minerals.json', minerals_json)
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return path
+
+
+def mineral(mineral_id: str, updated: str, *file_names: str) -> Dict:
+    return {'id': mineral_id, 'name': mineral_id, 'updatedAt': updated,
+            'photos': [{'id': f"{mineral_id}-{name}", 'fileName': name} for name in file_names]}
+
+
+def merge(tmp_path: Path, *archives: Path) -> zipfile.ZipFile:
+    output = tmp_path / 'merged.zip'
+    merge_archives(list(archives), output)
+    return zipfile.ZipFile(output)
+
+
+def test_photos_keep_app_layout(tmp_path):
+    crystal = b'crystal bytes'
+    phone = write_export(tmp_path / 'phone.zip', [mineral('m1', '2025-01-01T00:00:00Z', 'a.jpg')],
+                         {'photos/a.jpg': crystal})
+    tablet = write_export(tmp_path / 'tablet.zip', [mineral('m2', '2025-01-01T00:00:00Z', 'b.JPG')],
+                          {'photos/b.JPG': crystal})
+
+    with merge(tmp_path, phone, tablet) as zf:
+        minerals = json.loads(zf.read('minerals.json'))
+        media = [name for name in zf.namelist() if name.startswith('photos/')]
+        checksums = read_checksums(zf)
+
+    expected = f"{sha256(crystal)}.jpg"
+    assert media == [f"photos/{expected}"]
+    assert [photo['fileName'] for m in minerals for photo in m['photos']] == [expected, expected]
+    assert checksums[f"photos/{expected}"] == sha256(crystal)
+
+
+def test_unreferenced_media_are_dropped(tmp_path):
+    old = write_export(tmp_path / 'old.zip', [mineral('m1', '2025-01-01T00:00:00Z', 'other.jpg')],
+                       {'photos/other.jpg': b'old photo', 'photos/loose.jpg': b'loose'})
+    new = write_export(tmp_path / 'new.zip', [mineral('m1', '2025-06-01T00:00:00Z', 'new.jpg')],
+                       {'photos/new.jpg': b'new photo'})
+
+    output = tmp_path / 'merged.zip'
+    result = merge_archives([old, new], output)
+    with zipfile.ZipFile(output) as zf:
+        media = [name for name in zf.namelist() if name.startswith('photos/')]
+
+    assert media == [f"photos/{sha256(b'new photo')}.jpg"]
+    assert result.dropped == [(old, 'photos/other.jpg'), (old, 'photos/loose.jpg')]
+
+
+def test_tool_exports_keep_loose_media(tmp_path):
+    media_dir = tmp_path / 'media'
+    (media_dir / 'sub').mkdir(parents=True)
+    (media_dir / 'shared.jpg').write_bytes(b'shared')
+    (media_dir / 'sub' / 'first.png').write_bytes(b'first only')
+    csv_path = tmp_path / 'minerals.csv'
+    csv_path.write_text('name,group\nQuartz,Silicates\n', encoding='utf-8')
+    first = tmp_path / 'first.zip'
+    csv_to_zip.main(['-i', str(csv_path), '-o', str(first), '--media-dir', str(media_dir)])
+
+    (media_dir / 'sub' / 'first.png').unlink()
+    (media_dir / 'second.jpg').write_bytes(b'second only')
+    second = tmp_path / 'second.zip'
+    csv_to_zip.main(['-i', str(csv_path), '-o', str(second), '--media-dir', str(media_dir)])
+
+    output = tmp_path / 'merged.zip'
+    result = merge_archives([first, second], output)
+    with zipfile.ZipFile(output) as zf:
+        media = {zf.read(name) for name in zf.namelist() if name.startswith('media/')}
+        assert len(zf.namelist()) == 3 + 3
+
+    assert media == {b'shared', b'first only', b'second only'}
+    assert (result.media_in, result.media_out, result.dropped) == (4, 3, [])
+
+
+def test_listed_checksums_are_not_trusted(tmp_path):
+    wrong = sha256(b'something else')
+    archive = write_export(tmp_path / 'stale.zip', [mineral('m1', '2025-01-01T00:00:00Z', 'a.jpg')],
+                           {'photos/a.jpg': b'actual bytes'}, {'photos/a.jpg': wrong})
+
+    with merge(tmp_path, archive) as zf:
+        checksums = read_checksums(zf)
+        for name, digest in checksums.items():
+            assert sha256(zf.read(name)) == digest
+
+    assert f"photos/{sha256(b'actual bytes')}.jpg" in checksums
+    assert wrong not in checksums.values()
+
+
+def test_listed_checksums_never_merge_different_files(tmp_path):
+    first = write_export(tmp_path / 'first.zip', [mineral('m1', '2025-01-01T00:00:00Z', 'a.jpg')],
+                         {'photos/a.jpg': b'first photo'})
+    # Claims to hold the same file as first.zip, but does not
+    second = write_export(tmp_path / 'second.zip', [mineral('m2', '2025-01-01T00:00:00Z', 'b.jpg')],
+                          {'photos/b.jpg': b'second photo'}, {'photos/b.jpg': sha256(b'first photo')})
+
+    with merge(tmp_path, first, second) as zf:
+        minerals = {m['id']: m for m in json.loads(zf.read('minerals.json'))}
+        assert zf.read(f"photos/{minerals['m2']['photos'][0]['fileName']}") == b'second photo'
+
+
+@pytest.mark.parametrize('order', [('phone', 'tablet'), ('tablet', 'phone')])
+def test_reference_library_is_upserted(tmp_path, order):
+    exports = {
+        'phone': write_export(tmp_path / 'phone.zip', [], {REFERENCE_CSV_NAME: (
+            REFERENCE_HEADER
+            + 'r1,Quartz,Quartz,2025-01-01T00:00:00Z\n'
+            + 'r2,"Calcite, spath",Calcite,2025-03-01T00:00:00Z\n'
+        ).encode('utf-8')}),
+        'tablet': write_export(tmp_path / 'tablet.zip', [], {REFERENCE_CSV_NAME: (
+            REFERENCE_HEADER
+            + 'r1,Quartz hyalin,Rock crystal,2025-02-01T00:00:00Z\n'
+            + 'r2,Calcite,Calcite,2025-01-01T00:00:00Z\n'
+            + 'r3,Galène,Galena,\n'
+        ).encode('utf-8')}),
+    }
+
+    with merge(tmp_path, *(exports[name] for name in order)) as zf:
+        content = zf.read(REFERENCE_CSV_NAME)
+        assert read_checksums(zf)[REFERENCE_CSV_NAME] == sha256(content)
+
+    rows = {row['id']: row for row in read_reference_csv(content.decode('utf-8'))}
+    assert set(rows) == {'r1', 'r2', 'r3'}
+    assert rows['r1']['nameFr'] == 'Quartz hyalin'
+    assert rows['r2']['nameFr'] == 'Calcite, spath'
+    assert rows['r3']['nameEn'] == 'Galena'
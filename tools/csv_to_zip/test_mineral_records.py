@@ -0,0 +1,63 @@
+"""Tests of the slotted record model and its use by csv_to_zip.py (run with pytest)."""
+
+import json
+import zipfile
+
+import csv_to_zip
+from mineral_records import Mineral, Photo, dump_json_array
+
+MINERAL = {
+    'id': 'm1', 'name': 'Quartz', 'group': 'Silicates', 'magnetic': False, 'radioactive': False,
+    'tags': ['clear'], 'status': 'complete',
+    'provenance': {'id': 'p1', 'mineralId': 'm1', 'country': 'Brazil', 'latitude': -19.9, 'longitude': -43.9},
+    'storage': None,
+    'photos': [{'id': 'f1', 'mineralId': 'm1', 'type': 'UV_LW', 'caption': 'Under UV',
+                'takenAt': '2025-01-15T10:40:00Z', 'fileName': 'media/quartz-uv.jpg'}],
+}
+
+
+def test_mineral_round_trips_with_photo_records():
+    mineral = Mineral.from_dict(MINERAL)
+    assert isinstance(mineral.photos[0], Photo)
+    assert mineral.photos[0].fileName == 'media/quartz-uv.jpg'
+    assert mineral.photo_count == 1
+
+    data = mineral.to_dict()
+    assert Mineral.from_dict(data) == mineral
+    assert data['photos'] == MINERAL['photos']
+    assert data['provenance']['country'] == 'Brazil'
+    assert json.loads(dump_json_array([mineral])) == [data]
+
+
+def test_photo_gets_its_mineral_and_an_id():
+    mineral = Mineral(id='m2', name='Calcite')
+    mineral.add_photo(Photo(type='NORMAL', fileName='media/calcite.jpg'))
+    photo = mineral.to_dict()['photos'][0]
+    assert photo['mineralId'] == 'm2'
+    assert photo['id']
+    assert Photo.__slots__ == tuple(photo)
+
+
+def test_photos_csv_is_attached_to_minerals(tmp_path, capsys):
+    minerals_csv = tmp_path / 'minerals.csv'
+    minerals_csv.write_text('id,name\nm1,Quartz\nm2,Calcite\n', encoding='utf-8')
+    photos_csv = tmp_path / 'photos.csv'
+    photos_csv.write_text(
+        'mineralId,type,caption,takenAt,fileName\n'
+        'm1,NORMAL,Main view,2025-01-15T10:35:00Z,media/quartz.jpg\n'
+        'm1,UV_LW,,,media/quartz-uv.jpg\n'
+        'missing,NORMAL,,,media/other.jpg\n', encoding='utf-8')
+    output = tmp_path / 'export.zip'
+
+    csv_to_zip.main(['-i', str(minerals_csv), '-o', str(output), '--photos', str(photos_csv)])
+
+    with zipfile.ZipFile(output) as zf:
+        manifest = json.loads(zf.read('manifest.json'))
+        minerals = {m['id']: m for m in json.loads(zf.read('minerals.json'))}
+    assert manifest['counts']['photos'] == 2
+    assert [(p['type'], p['caption'], p['fileName'], p['mineralId']) for p in minerals['m1']['photos']] == [
+        ('NORMAL', 'Main view', 'media/quartz.jpg', 'm1'),
+        ('UV_LW', None, 'media/quartz-uv.jpg', 'm1'),
+    ]
+    assert minerals['m2']['photos'] == []
+    assert '1 photo row(s)' in capsys.readouterr().err
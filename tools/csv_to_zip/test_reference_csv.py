@@ -0,0 +1,120 @@
+"""Round-trip tests of reference_minerals.csv against the app's CSV reader (run with pytest)."""
+
+import hashlib
+import json
+import zipfile
+from pathlib import Path
+
+import csv_to_zip
+from merge_archives import read_checksums
+from reference_csv import (REFERENCE_CSV_HEADERS, REFERENCE_CSV_NAME, ReferenceCsv, escape_csv_value,
+                           parse_csv_line, read_reference_csv)
+
+ASSET_V6 = Path(__file__).resolve().parents[2] / 'app' / 'src' / 'main' / 'assets' / 'reference_minerals_v6.json'
+
+
+def build_archive(tmp_path: Path, reference: Path) -> zipfile.ZipFile:
+    minerals_csv = tmp_path / 'minerals.csv'
+    minerals_csv.write_text('name,group\nQuartz,Silicates\n', encoding='utf-8')
+    output = tmp_path / 'export.zip'
+    csv_to_zip.main(['-i', str(minerals_csv), '-o', str(output), '--reference', str(reference)])
+    return zipfile.ZipFile(output)
+
+
+def read_entry(zf: zipfile.ZipFile) -> str:
+    content = zf.read(REFERENCE_CSV_NAME)
+    assert read_checksums(zf)[REFERENCE_CSV_NAME] == hashlib.sha256(content).hexdigest()
+    return content.decode('utf-8')
+
+
+def test_parse_csv_line_reads_escaped_values():
+    # Quoted values that the app's parser reads back as written
+    values = ['plain', 'a,b', 'dit "oeil de chat"', '', 'x, y', 'end']
+    line = ','.join(escape_csv_value(value) for value in values)
+    assert parse_csv_line(line) == values
+
+
+def test_archive_round_trip(tmp_path):
+    reference = tmp_path / 'reference.json'
+    reference.write_text(json.dumps({
+        'source': 'Test library',
+        'minerals': [
+            {'id': 'r1', 'nameFr': 'Quartz', 'nameEn': 'Quartz', 'formula': 'SiO2',
+             'mohsMin': 7, 'mohsMax': 7.0, 'density': 2.65, 'crystalSystem': 'Trigonal',
+             'luster': 'Vitreux, gras', 'streak': 'Blanc', 'transparency': 'Transparent',
+             'notes': 'Variété oeil-de-chat, maclée\nligne 2\r\nligne 3', 'isUserDefined': True,
+             'createdAt': '2025-11-16T17:52:12Z', 'updatedAt': '2025-11-16T17:52:12Z'},
+            {'nameFr': 'Calcite', 'nameEn': 'Calcite', 'diaphaneity': 'Translucide',
+             'source': 'Own notes'},
+        ],
+    }), encoding='utf-8')
+
+    with build_archive(tmp_path, reference) as zf:
+        rows = read_reference_csv(read_entry(zf))
+
+    assert len(rows) == 2
+    quartz, calcite = rows
+    assert list(quartz) == list(REFERENCE_CSV_HEADERS)
+    assert quartz['id'] == 'r1'
+    assert quartz['formula'] == 'SiO2'
+    assert (quartz['mohsMin'], quartz['mohsMax'], quartz['density']) == ('7.0', '7.0', '2.65')
+    assert quartz['luster'] == 'Vitreux, gras'
+    assert quartz['diaphaneity'] == 'Transparent'
+    assert quartz['notes'] == 'Variété oeil-de-chat, maclée ligne 2 ligne 3'
+    assert quartz['isUserDefined'] == 'true'
+    assert quartz['source'] == 'Test library'
+    assert quartz['createdAt'] == '2025-11-16T17:52:12Z'
+
+    assert calcite['id']
+    assert calcite['diaphaneity'] == 'Translucide'
+    assert calcite['isUserDefined'] == 'false'
+    assert calcite['source'] == 'Own notes'
+
+
+def test_csv_source_round_trips_to_identical_bytes(tmp_path):
+    reference = tmp_path / 'reference.json'
+    reference.write_text(json.dumps([
+        {'id': 'r1', 'nameFr': 'Galène', 'nameEn': 'Galena', 'cleavage': 'Cubique, parfait'},
+    ]), encoding='utf-8')
+    with build_archive(tmp_path, reference) as zf:
+        first = zf.read(REFERENCE_CSV_NAME)
+
+    reference_csv = tmp_path / 'reference.csv'
+    reference_csv.write_bytes(first)
+    (tmp_path / 'export.zip').unlink()
+    with build_archive(tmp_path, reference_csv) as zf:
+        assert zf.read(REFERENCE_CSV_NAME) == first
+
+
+def test_unreadable_rows_are_reported(tmp_path):
+    reference = tmp_path / 'reference.json'
+    reference.write_text(json.dumps([
+        {'id': 'ok', 'nameFr': 'Pyrite', 'nameEn': 'Pyrite'},
+        {'id': 'bad', 'nameFr': 'Fluorite', 'nameEn': 'Fluorite', 'fluorescence': '{"a": "b", "c": "d"}'},
+        {'id': 'odd', 'nameFr': 'Quartz', 'nameEn': 'Quartz', 'notes': 'Cristal de 5" environ'},
+    ]), encoding='utf-8')
+    scan = ReferenceCsv.scan(reference)
+    assert scan.rows == 3
+    assert scan.unreadable == [('bad', 'fluorescence'), ('odd', 'notes')]
+
+
+def test_v6_asset_keeps_loader_fields(tmp_path):
+    dataset = json.loads(ASSET_V6.read_text(encoding='utf-8'))
+    unreadable = {mineral_id for mineral_id, _ in ReferenceCsv.scan(ASSET_V6).unreadable}
+
+    with build_archive(tmp_path, ASSET_V6) as zf:
+        rows = read_reference_csv(read_entry(zf))
+
+    assert len(rows) == len(dataset['minerals'])
+    checked = 0
+    for row, entry in zip(rows, dataset['minerals']):
+        if entry['id'] in unreadable:
+            continue
+        # ReferenceMineralDatasetLoader: transparency ?: diaphaneity, source ?: dataset.source
+        transparency = entry.get('transparency')
+        assert row['diaphaneity'] == (transparency if transparency is not None else entry.get('diaphaneity') or '')
+        assert row['source'] == (entry.get('source') or dataset['source'])
+        assert row['nameFr'] == entry['nameFr']
+        checked += 1
+    assert checked >= len(rows) - len(unreadable)
+    assert sum(1 for row in rows if row['diaphaneity']) > 200
@@ -0,0 +1,59 @@
+"""Tests of the reference id maps written by the dedup tools (run with pytest)."""
+
+from pathlib import Path
+
+import pytest
+
+from reference_id_map import (asset_ids, build_id_map, check_id_map, id_map_path, read_id_map,
+                              write_id_map)
+
+ASSETS = Path(__file__).resolve().parents[2] / 'app' / 'src' / 'main' / 'assets'
+
+
+def test_ids_surviving_in_another_group_are_not_remapped():
+    # 'b' is folded into 'a' by the first group but survives the second one
+    groups = [['a', 'b', 'x'], ['b', 'c'], ['d', None, 'e']]
+    survivors = ['a', 'b', 'd']
+    assert build_id_map(groups, survivors) == {'x': 'a', 'c': 'b', 'e': 'd'}
+
+
+def test_groups_without_a_survivor_map_nothing():
+    assert build_id_map([['a', 'b'], ['c', 'd']], [None, 'c']) == {'d': 'c'}
+    assert build_id_map([['a', 'b']], ['']) == {}
+
+
+def test_first_group_wins_for_an_id_listed_twice():
+    assert build_id_map([['a', 'x'], ['b', 'x']], ['a', 'b']) == {'x': 'a'}
+
+
+def test_check_id_map_reports_each_failure():
+    old_ids = ['kept', 'moved', 'lost', 'dangling', 'remapped', None]
+    new_ids = ['kept', 'target', 'remapped']
+    id_map = {'moved': 'target', 'dangling': 'gone', 'remapped': 'target'}
+
+    assert check_id_map(old_ids, new_ids, id_map) == [
+        'dangling: remapped to gone, which is not in the new asset',
+        'lost: missing from the new asset and the id map',
+        'remapped: still present but remapped to target',
+    ]
+    assert check_id_map(['kept', 'moved'], new_ids, {'moved': 'target'}) == []
+
+
+def test_write_read_round_trip(tmp_path):
+    path = id_map_path(tmp_path / 'reference_minerals_v7.json')
+    assert path.name == 'reference_minerals_v7.idmap.csv'
+
+    write_id_map(path, {'b-old': 'b', 'a-old': 'a, with comma'})
+    assert path.read_text(encoding='utf-8').splitlines()[:2] == ['oldId,newId', 'a-old,"a, with comma"']
+    assert read_id_map(path) == {'a-old': 'a, with comma', 'b-old': 'b'}
+
+    path.write_text('from,to\n', encoding='utf-8')
+    with pytest.raises(ValueError):
+        read_id_map(path)
+
+
+def test_shipped_v6_map_resolves_every_v5_id():
+    v6 = ASSETS / 'reference_minerals_v6.json'
+    id_map = read_id_map(id_map_path(v6))
+    assert id_map
+    assert check_id_map(asset_ids(ASSETS / 'reference_minerals_v5.json'), asset_ids(v6), id_map) == []